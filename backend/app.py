@@ -6,40 +6,109 @@ import logging
 import json
 import time
 from datetime import datetime
-from flask import Flask, request, jsonify, Response
+from flask import Flask, Blueprint, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-from sqlalchemy import or_, func, text
+from sqlalchemy import func, text, select
 
 from models.base import Base
 from models.import_job import ImportJob
+from models.bulk_job import BulkJob
 from models.product import Product
 from models.webhook import Webhook
-from utils.session_manager import get_session, safe_close, engine
+from models.mapping_profile import MappingProfile
+from config.config import READ_YOUR_WRITES_SECONDS, LOOKUP_MAX_SKUS, LOOKUP_CHUNK_SIZE, CHANGE_FEED_MAX_LIMIT
+from utils.session_manager import get_session, get_read_session, safe_close, get_engine, pool_status
 from utils.webhooks import trigger_webhooks
-from tasks.import_tasks import process_csv_import
+from utils.product_query import product_filter_clauses, product_order_by, product_facets, normalize_skus, lookup_products, parse_fields, product_columns, product_row_encoder, PRODUCT_FIELDS
+from utils.fast_json import json_response
+from utils.import_scheduler import dispatch_queued_imports, queue_position
+from utils.import_sync import IMPORT_MODES, MISSING_ACTIONS
+from utils.bulk import clean_bulk_filters, validate_bulk_request
+from utils.change_feed import record_changes, read_changes, feed_position
+from utils.csv_mapping import CsvMapping, IMPORT_FIELDS, UPDATABLE_FIELDS, resolve_delimiter, resolve_positions, missing_fields, required_fields
+from utils.product_cache import get_product as get_cached_product, put_product, invalidate_skus, cache_stats
+from utils.storage import get_storage, open_text
+
+# Nothing here touches the database, Redis or the filesystem at import
+# time: engines, the Celery client and upload storage are created on
+# first use, so web workers, Celery workers and tests only pay for what
+# they actually exercise.
+api = Blueprint("api", __name__)
 
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+logger = logging.getLogger(__name__)
 
-UPLOAD_FOLDER = "uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+READ_PRIMARY_COOKIE = "read_primary_until"
+# POST only because the payload is too large for a query string; writes nothing
+READ_ONLY_ENDPOINTS = {"api.lookup_products_batch"}
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+
+# ---------- Read/write routing ----------
+def read_session():
+    """Session for read-only endpoints.
+
+    Goes to the replica unless the client asked for a consistent read
+    (``?consistent=1`` or ``X-Read-Your-Writes`` header) or mutated data
+    within the last READ_YOUR_WRITES_SECONDS.
+    """
+    primary = request.args.get("consistent", "").lower() in ("true", "1", "yes")
+    primary = primary or bool(request.headers.get("X-Read-Your-Writes"))
+    if not primary:
+        try:
+            primary = float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            primary = False
+    return get_read_session(primary=primary)
+
+
+def read_job(model, job_id):
+    """(session, job) for a lookup by id.
+
+    Tries the replica first and falls back to the primary on a miss, so a
+    job created a moment ago is not reported missing while the replica
+    catches up. The dashboard is cross-origin and never sends the
+    read-your-writes cookie, so that cannot be relied on here.
+    """
+    session = read_session()
+    job = session.get(model, job_id)
+    if job is None and session.bind is not get_engine():
+        safe_close(session)
+        session = get_session()
+        job = session.get(model, job_id)
+    return session, job
+
+
+@api.after_request
+def mark_recent_write(response):
+    if (
+        request.method in ("POST", "PUT", "PATCH", "DELETE")
+        and request.endpoint not in READ_ONLY_ENDPOINTS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + READ_YOUR_WRITES_SECONDS),
+            max_age=READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
+    return response
 
 
 # ---------- CSV Import helpers ----------
-def validate_csv_structure(path: str):
+def validate_csv_structure(path: str, mapping=None, mode="upsert"):
+    mapping = mapping or CsvMapping()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            if not reader.fieldnames:
+        delimiter = resolve_delimiter(path, mapping)
+        with open_text(path, mapping.encoding) as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            header = next(reader, None)
+            if not header:
                 return False, "Empty CSV"
-            required = {"sku", "name", "price"}
-            headers = {h.lower() for h in reader.fieldnames}
-            missing = required - headers
+            positions = resolve_positions(header, mapping)
+            missing = missing_fields(positions, required_fields(mode))
             if missing:
                 return False, f"Missing columns: {', '.join(sorted(missing))}"
+            if mode == "partial" and not any(f in positions for f in UPDATABLE_FIELDS):
+                return False, f"Partial import needs at least one of: {', '.join(UPDATABLE_FIELDS)}"
             # Optionally check first data row exists
             first = next(reader, None)
             if first is None:
@@ -49,8 +118,14 @@ def validate_csv_structure(path: str):
         return False, f"CSV read error: {str(e)}"
 
 
+def _find_mapping_profile(session, ref):
+    if str(ref).isdigit():
+        return session.get(MappingProfile, int(ref))
+    return session.query(MappingProfile).filter(MappingProfile.name == ref).first()
+
+
 # ---------- Import endpoints ----------
-@app.route("/api/imports", methods=["POST"])
+@api.route("/api/imports", methods=["POST"])
 def upload_csv():
     file = request.files.get("file")
     if not file or not file.filename.lower().endswith(".csv"):
@@ -62,31 +137,53 @@ def upload_csv():
     if file_size_bytes > 1500 * 1024 * 1024:
         return jsonify({"error": "File too large (>1500MB)"}), 413
 
+    source = (request.form.get("source") or "").strip() or None
+    mode = (request.form.get("mode") or "upsert").strip().lower()
+    missing_action = (request.form.get("missing_action") or "deactivate").strip().lower()
+    if mode not in IMPORT_MODES:
+        return jsonify({"error": f"mode must be one of: {', '.join(IMPORT_MODES)}"}), 400
+    if missing_action not in MISSING_ACTIONS:
+        return jsonify({"error": f"missing_action must be one of: {', '.join(MISSING_ACTIONS)}"}), 400
+    if mode == "delta" and not source:
+        return jsonify({"error": "delta mode requires a source"}), 400
+
     job_id = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_FOLDER, f"{job_id}_{file.filename}")
 
     try:
-        file.save(file_path)
+        file_path = get_storage().save(file.stream, f"{job_id}_{file.filename}")
     except Exception as e:
         logger.error("File save failed: %s", e)
         return jsonify({"error": "Failed to save file"}), 500
 
-    is_valid, msg = validate_csv_structure(file_path)
     session = get_session()
     try:
+        profile = None
+        profile_ref = (request.form.get("mapping_profile") or "").strip()
+        if profile_ref:
+            profile = _find_mapping_profile(session, profile_ref)
+            if not profile:
+                get_storage(file_path).delete(file_path)
+                return jsonify({"error": "Mapping profile not found"}), 400
+
+        is_valid, msg = validate_csv_structure(file_path, CsvMapping.from_profile(profile), mode)
         job = ImportJob(
             id=job_id,
             status="queued" if is_valid else "failed",
             file_path=file_path,
             file_size_mb=file_size_bytes / (1024 * 1024),
+            source=source,
+            mapping_profile_id=profile.id if profile else None,
+            mode=mode,
+            missing_action=missing_action if mode in ("full_sync", "delta") else None,
             error_message=None if is_valid else msg,
         )
         session.add(job)
         session.commit()
 
         if is_valid:
-            process_csv_import.delay(job_id)
             logger.info("Queued import job %s", job_id)
+            dispatch_queued_imports()
+            session.refresh(job)
         else:
             logger.warning("Invalid CSV for job %s: %s", job_id, msg)
 
@@ -95,6 +192,7 @@ def upload_csv():
                 {
                     "job_id": job_id,
                     "status": job.status,
+                    "queue_position": queue_position(session, job),
                     "message": msg if not is_valid else "Upload successful, processing queued",
                 }
             ),
@@ -108,24 +206,41 @@ def upload_csv():
         safe_close(session)
 
 
-@app.route("/api/imports/<job_id>/status", methods=["GET"])
+@api.route("/api/imports/<job_id>/status", methods=["GET"])
 def get_import_status(job_id):
-    session = get_session()
+    session, job = read_job(ImportJob, job_id)
     try:
-        job = session.get(ImportJob, job_id)
         if not job:
             return jsonify({"error": "Job not found"}), 404
-        return jsonify(job.to_dict())
+        data = job.to_dict()
+        data["queue_position"] = queue_position(session, job)
+        return jsonify(data)
     finally:
         safe_close(session)
 
 
-@app.route("/api/imports/<job_id>/status-stream", methods=["GET"])
+@api.route("/api/imports/<job_id>/report", methods=["GET"])
+def get_import_report(job_id):
+    """Full validation report of a finished dry_run job."""
+    session, job = read_job(ImportJob, job_id)
+    try:
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        if job.mode != "dry_run":
+            return jsonify({"error": "Reports are only produced by dry_run imports"}), 400
+        if not job.report:
+            return jsonify({"error": "Report not ready", "status": job.status}), 409
+        return Response(job.report, mimetype="application/json")
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/imports/<job_id>/status-stream", methods=["GET"])
 def status_stream(job_id):
     def event_stream():
-        session = get_session()
+        # Opened here so a client gone before the first chunk leaks nothing
+        session, job = read_job(ImportJob, job_id)
         try:
-            job = session.get(ImportJob, job_id)
             if not job:
                 yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
                 return
@@ -154,10 +269,11 @@ def status_stream(job_id):
         finally:
             safe_close(session)
 
-    return Response(event_stream(), mimetype="text/event-stream")
+    # read_job picks replica vs primary from the request
+    return Response(stream_with_context(event_stream()), mimetype="text/event-stream")
 
 
-@app.route("/api/imports/<job_id>/retry", methods=["POST"])
+@api.route("/api/imports/<job_id>/retry", methods=["POST"])
 def retry_import(job_id):
     session = get_session()
     try:
@@ -167,6 +283,8 @@ def retry_import(job_id):
 
         if job.status not in ["failed", "cancelled"]:
             return jsonify({"error": "Can only retry failed or cancelled jobs"}), 400
+        if job.file_purged or not get_storage(job.file_path).exists(job.file_path):
+            return jsonify({"error": "Upload no longer available; please upload the file again"}), 400
 
         job.status = "queued"
         job.processed_rows = 0
@@ -176,8 +294,8 @@ def retry_import(job_id):
         job.updated_at = datetime.utcnow()
         session.commit()
 
-        process_csv_import.delay(job_id)
         logger.info("Retrying import job %s", job_id)
+        dispatch_queued_imports()
         return jsonify({"message": "Retry started"}), 202
     except Exception as e:
         session.rollback()
@@ -187,7 +305,7 @@ def retry_import(job_id):
         safe_close(session)
 
 
-@app.route("/api/imports/<job_id>/cancel", methods=["POST"])
+@api.route("/api/imports/<job_id>/cancel", methods=["POST"])
 def cancel_import(job_id):
     session = get_session()
     try:
@@ -213,47 +331,136 @@ def cancel_import(job_id):
 
 
 # ---------- Products ----------
-@app.route("/api/products", methods=["GET"])
+@api.route("/api/products", methods=["GET"])
 def list_products():
-    session = get_session()
+    session = read_session()
     try:
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 20))
-        search = (request.args.get("search") or "").strip().lower()
-        active_str = request.args.get("active")
-
-        query = session.query(Product)
-
-        if active_str is not None:
-            active = active_str.lower() in ("true", "1", "yes")
-            query = query.filter(Product.active == active)
-
-        if search:
-            query = query.filter(
-                or_(
-                    func.lower(Product.sku).contains(search),
-                    func.lower(Product.name).contains(search),
-                    func.lower(Product.description).contains(search),
-                )
+        try:
+            fields = parse_fields(request.args.get("fields"))
+            clauses = product_filter_clauses(
+                active=request.args.get("active"),
+                search=request.args.get("search"),
+                min_price=request.args.get("min_price"),
+                max_price=request.args.get("max_price"),
+                updated_since=request.args.get("updated_since"),
             )
+            order_by = product_order_by(request.args.get("sort"), request.args.get("order"))
+        except ValueError as e:
+            return jsonify({"error": f"Invalid filter or sort: {e}"}), 400
+
+        # Core rows of just the requested columns; no ORM objects or to_dict()
+        stmt = select(*product_columns(fields)).where(*clauses)
+        if order_by:
+            stmt = stmt.order_by(*order_by)
+
+        total = session.execute(select(func.count()).select_from(Product).where(*clauses)).scalar()
+        rows = session.execute(stmt.offset((page - 1) * per_page).limit(per_page)).all()
+        encode = product_row_encoder(fields)
+
+        result = {
+            "data": [encode(row) for row in rows],
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": (total + per_page - 1) // per_page,
+        }
+        if request.args.get("facets", "").lower() in ("true", "1", "yes"):
+            result["facets"] = product_facets(session, clauses)
+        return json_response(result)
+    finally:
+        safe_close(session)
 
-        total = query.count()
-        items = query.offset((page - 1) * per_page).limit(per_page).all()
 
-        return jsonify(
-            {
-                "data": [p.to_dict() for p in items],
-                "total": total,
-                "page": page,
-                "per_page": per_page,
-                "pages": (total + per_page - 1) // per_page,
-            }
-        )
+@api.route("/api/products/changes", methods=["GET"])
+def product_changes():
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(int(request.args.get("limit", 1000)), CHANGE_FEED_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if since < 0 or limit < 1:
+        return jsonify({"error": "since must be >= 0 and limit >= 1"}), 400
+
+    session = read_session()
+    try:
+        result = read_changes(session, since, limit)
+        if result is None:
+            # Resync the full catalog, then continue from resync_cursor: anything
+            # committed during the resync has a higher seq and is replayed
+            pruned_through, head = feed_position(session)
+            return jsonify(
+                {
+                    "error": "Cursor expired, full resync required",
+                    "pruned_through": pruned_through,
+                    "resync_cursor": head,
+                }
+            ), 410
+        changes, next_cursor, has_more = result
+        return json_response({"data": changes, "next_cursor": next_cursor, "has_more": has_more})
+    finally:
+        safe_close(session)
+
+
+_CACHE_ENCODER = product_row_encoder(PRODUCT_FIELDS, dates_as_text=True)
+
+
+def _load_product(sku):
+    # Cache fills read the primary so a lagging replica is never cached
+    session = get_session()
+    try:
+        row = session.execute(
+            select(*product_columns(PRODUCT_FIELDS)).where(func.lower(Product.sku) == sku).limit(1)
+        ).first()
+        # Cached values go through the stdlib json, so dates are encoded here
+        return _CACHE_ENCODER(row) if row else None
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/products/<sku>", methods=["GET"])
+def get_product(sku):
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    product = get_cached_product(sku, _load_product)
+    if product is None:
+        return jsonify({"error": "Product not found"}), 404
+    if fields != PRODUCT_FIELDS:
+        product = {f: product[f] for f in fields}
+    return json_response(product)
+
+
+@api.route("/api/products/lookup", methods=["POST"])
+def lookup_products_batch():
+    data = request.json or {}
+    raw_skus = data.get("skus")
+    if not isinstance(raw_skus, list):
+        return jsonify({"error": "skus must be a list"}), 400
+    if len(raw_skus) > LOOKUP_MAX_SKUS:
+        return jsonify({"error": f"At most {LOOKUP_MAX_SKUS} SKUs per request"}), 400
+
+    fields = data.get("fields") or list(PRODUCT_FIELDS)
+    if not isinstance(fields, list) or not all(isinstance(f, str) for f in fields):
+        return jsonify({"error": "fields must be a list of field names"}), 400
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+    if "sku" not in fields:
+        fields = ["sku"] + list(fields)
+
+    skus = normalize_skus(raw_skus)
+    session = read_session()
+    try:
+        found, missing = lookup_products(session, skus, fields, chunk_size=LOOKUP_CHUNK_SIZE)
+        return json_response({"data": found, "missing": missing, "found": len(found), "requested": len(skus)})
     finally:
         safe_close(session)
 
 
-@app.route("/api/products", methods=["POST"])
+@api.route("/api/products", methods=["POST"])
 def create_product():
     data = request.json or {}
     if "sku" not in data:
@@ -273,7 +480,9 @@ def create_product():
             active=data.get("active", True),
         )
         session.add(product)
+        record_changes(session, [sku])
         session.commit()
+        put_product(product.to_dict())
 
         try:
             trigger_webhooks("product.created", product.to_dict())
@@ -289,7 +498,7 @@ def create_product():
         safe_close(session)
 
 
-@app.route("/api/products/<sku>", methods=["PUT"])
+@api.route("/api/products/<sku>", methods=["PUT"])
 def update_product(sku):
     data = request.json or {}
     session = get_session()
@@ -303,7 +512,9 @@ def update_product(sku):
         product.price = float(data.get("price")) if "price" in data else product.price
         product.active = data.get("active", product.active)
 
+        record_changes(session, [product.sku])
         session.commit()
+        put_product(product.to_dict())
 
         try:
             trigger_webhooks("product.updated", product.to_dict())
@@ -319,7 +530,7 @@ def update_product(sku):
         safe_close(session)
 
 
-@app.route("/api/products/<sku>", methods=["DELETE"])
+@api.route("/api/products/<sku>", methods=["DELETE"])
 def delete_product(sku):
     session = get_session()
     try:
@@ -329,7 +540,9 @@ def delete_product(sku):
 
         product_data = product.to_dict()
         session.delete(product)
+        record_changes(session, [product_data["sku"]], op="delete")
         session.commit()
+        invalidate_skus([product_data["sku"]])
 
         try:
             trigger_webhooks("product.deleted", product_data)
@@ -345,27 +558,255 @@ def delete_product(sku):
         safe_close(session)
 
 
-@app.route("/api/products/bulk-delete", methods=["DELETE"])
-def bulk_delete_products():
+def _queue_bulk_job(operation, filters, params):
+    from celery_app import celery
+
     session = get_session()
     try:
-        count = session.query(Product).delete()
+        job = BulkJob(
+            operation=operation,
+            filters=json.dumps(filters),
+            params=json.dumps(params),
+        )
+        session.add(job)
         session.commit()
         try:
-            trigger_webhooks("product.bulk_deleted", {"deleted_count": count})
-        except Exception:
-            logger.exception("Trigger webhooks (product.bulk_deleted) failed")
-        return jsonify({"message": f"Deleted {count} products"})
+            celery.send_task("tasks.bulk_tasks.process_bulk_operation", args=[job.id])
+        except Exception as e:
+            # Nothing re-dispatches bulk jobs, so never leave one queued forever
+            job.status = "failed"
+            job.error_message = f"Could not queue job: {e}"
+            session.commit()
+            raise
+        logger.info("Queued bulk %s job %s", operation, job.id)
+        return job.id
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/products/bulk", methods=["POST"])
+def bulk_products():
+    data = request.json or {}
+    operation = data.get("operation")
+    params = data.get("params") or {}
+    all_rows = data.get("all") is True
+
+    filters, error = clean_bulk_filters(data.get("filters") or {})
+    if not error:
+        error = validate_bulk_request(operation, params)
+    if not error and not filters and not all_rows:
+        error = 'filters required; pass "all": true to apply the operation to every product'
+    if not error and filters and all_rows:
+        error = '"all" cannot be combined with filters'
+    if error:
+        return jsonify({"error": error}), 400
+    if all_rows:
+        params = dict(params, all=True)
+    try:
+        product_filter_clauses(**filters)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filters: {e}"}), 400
+
+    try:
+        job_id = _queue_bulk_job(operation, filters, params)
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+    except Exception as e:
+        logger.error("Bulk job creation failed: %s", e)
+        return jsonify({"error": "Failed to create bulk job"}), 500
+
+
+@api.route("/api/products/bulk/<job_id>/status", methods=["GET"])
+def get_bulk_status(job_id):
+    session, job = read_job(BulkJob, job_id)
+    try:
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job.to_dict())
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/products/bulk/<job_id>/cancel", methods=["POST"])
+def cancel_bulk(job_id):
+    session = get_session()
+    try:
+        job = session.get(BulkJob, job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        if job.status in ["completed", "failed", "cancelled"]:
+            return jsonify({"error": "Cannot cancel a finished job"}), 400
+
+        job.status = "cancelled"
+        job.error_message = "Bulk operation cancelled by user"
+        job.updated_at = datetime.utcnow()
+        session.commit()
+        logger.info("Cancelled bulk job %s", job_id)
+        return jsonify({"message": "Bulk operation cancelled successfully"}), 200
     except Exception as e:
         session.rollback()
+        logger.error("Cancel failed for bulk job %s: %s", job_id, e)
+        return jsonify({"error": "Cancel failed"}), 500
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/products/bulk-delete", methods=["DELETE"])
+def bulk_delete_products():
+    try:
+        job_id = _queue_bulk_job("delete", {}, {"all": True})
+        return jsonify({"message": "Bulk delete queued", "job_id": job_id}), 202
+    except Exception as e:
         logger.error("Bulk delete failed: %s", e)
         return jsonify({"error": "Bulk delete failed"}), 500
+
+
+# ---------- Mapping profiles ----------
+def _apply_mapping_profile(profile, data):
+    """Copy validated fields from a request body; returns an error string or None."""
+    for field in ("name", "delimiter", "encoding", "decimal_separator", "thousands_separator"):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return f"{field} must be a string"
+    if "name" in data:
+        if not (data.get("name") or "").strip():
+            return "name required"
+        if data["name"].strip().isdigit():
+            return "name cannot be purely numeric"
+        profile.name = data["name"].strip()
+    if "columns" in data:
+        columns = data.get("columns") or {}
+        if (
+            not isinstance(columns, dict)
+            or any(f not in IMPORT_FIELDS for f in columns)
+            or not all(isinstance(h, str) and h.strip() for h in columns.values())
+        ):
+            return f"columns must map fields ({', '.join(IMPORT_FIELDS)}) to CSV headers"
+        profile.columns = json.dumps(columns)
+    if "delimiter" in data:
+        delimiter = data.get("delimiter") or None
+        if delimiter is not None and len(delimiter) != 1:
+            return "delimiter must be a single character"
+        profile.delimiter = delimiter
+    if "encoding" in data:
+        encoding = data.get("encoding") or "utf-8-sig"
+        try:
+            "".encode(encoding)
+        except LookupError:
+            return f"Unknown encoding: {encoding}"
+        profile.encoding = encoding
+    if "true_values" in data:
+        values = data.get("true_values")
+        if values is not None and (not isinstance(values, list) or not all(isinstance(v, str) for v in values)):
+            return "true_values must be a list of strings"
+        profile.true_values = json.dumps(values) if values else None
+    if "decimal_separator" in data:
+        separator = data.get("decimal_separator") or "."
+        if len(separator) != 1:
+            return "decimal_separator must be a single character"
+        profile.decimal_separator = separator
+    if "thousands_separator" in data:
+        separator = data.get("thousands_separator") or None
+        if separator is not None and len(separator) != 1:
+            return "thousands_separator must be a single character"
+        profile.thousands_separator = separator
+    if profile.decimal_separator == profile.thousands_separator:
+        return "decimal_separator and thousands_separator must differ"
+    return None
+
+
+@api.route("/api/mapping-profiles", methods=["GET"])
+def list_mapping_profiles():
+    session = read_session()
+    try:
+        profiles = session.query(MappingProfile).order_by(MappingProfile.name).all()
+        return jsonify([p.to_dict() for p in profiles])
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/mapping-profiles/<ref>", methods=["GET"])
+def get_mapping_profile(ref):
+    session = read_session()
+    try:
+        profile = _find_mapping_profile(session, ref)
+        if not profile:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify(profile.to_dict())
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/mapping-profiles", methods=["POST"])
+def create_mapping_profile():
+    data = request.json or {}
+    if not (data.get("name") or "").strip():
+        return jsonify({"error": "name required"}), 400
+
+    session = get_session()
+    try:
+        if session.query(MappingProfile).filter(MappingProfile.name == data["name"].strip()).first():
+            return jsonify({"error": "Profile name already exists"}), 409
+
+        profile = MappingProfile(encoding="utf-8-sig", decimal_separator=".")
+        error = _apply_mapping_profile(profile, data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        session.add(profile)
+        session.commit()
+        return jsonify(profile.to_dict()), 201
+    except Exception as e:
+        session.rollback()
+        logger.error("Create mapping profile failed: %s", e)
+        return jsonify({"error": "Create mapping profile failed"}), 500
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/mapping-profiles/<ref>", methods=["PUT"])
+def update_mapping_profile(ref):
+    data = request.json or {}
+    session = get_session()
+    try:
+        profile = _find_mapping_profile(session, ref)
+        if not profile:
+            return jsonify({"error": "Not found"}), 404
+
+        error = _apply_mapping_profile(profile, data)
+        if error:
+            session.rollback()
+            return jsonify({"error": error}), 400
+
+        session.commit()
+        return jsonify(profile.to_dict())
+    except Exception as e:
+        session.rollback()
+        logger.error("Update mapping profile failed: %s", e)
+        return jsonify({"error": "Update failed"}), 500
+    finally:
+        safe_close(session)
+
+
+@api.route("/api/mapping-profiles/<ref>", methods=["DELETE"])
+def delete_mapping_profile(ref):
+    session = get_session()
+    try:
+        profile = _find_mapping_profile(session, ref)
+        if not profile:
+            return jsonify({"error": "Not found"}), 404
+        session.delete(profile)
+        session.commit()
+        return jsonify({"message": "Mapping profile deleted successfully"})
+    except Exception as e:
+        session.rollback()
+        logger.error("Delete mapping profile failed: %s", e)
+        return jsonify({"error": "Delete failed"}), 500
     finally:
         safe_close(session)
 
 
 # ---------- Webhook endpoints ----------
-@app.route("/api/webhooks", methods=["GET"])
+@api.route("/api/webhooks", methods=["GET"])
 def list_webhooks():
     session = get_session()
     try:
@@ -375,7 +816,7 @@ def list_webhooks():
         safe_close(session)
 
 
-@app.route("/api/webhooks/<int:webhook_id>", methods=["GET"])
+@api.route("/api/webhooks/<int:webhook_id>", methods=["GET"])
 def get_webhook(webhook_id):
     session = get_session()
     try:
@@ -387,7 +828,7 @@ def get_webhook(webhook_id):
         safe_close(session)
 
 
-@app.route("/api/webhooks", methods=["POST"])
+@api.route("/api/webhooks", methods=["POST"])
 def create_webhook():
     data = request.json or {}
     if not data.get("url") or not data.get("event_type"):
@@ -412,7 +853,7 @@ def create_webhook():
         safe_close(session)
 
 
-@app.route("/api/webhooks/<int:webhook_id>", methods=["PUT"])
+@api.route("/api/webhooks/<int:webhook_id>", methods=["PUT"])
 def update_webhook(webhook_id):
     data = request.json or {}
     session = get_session()
@@ -441,7 +882,7 @@ def update_webhook(webhook_id):
         safe_close(session)
 
 
-@app.route("/api/webhooks/<int:webhook_id>", methods=["DELETE"])
+@api.route("/api/webhooks/<int:webhook_id>", methods=["DELETE"])
 def delete_webhook(webhook_id):
     session = get_session()
     try:
@@ -459,7 +900,7 @@ def delete_webhook(webhook_id):
         safe_close(session)
 
 
-@app.route("/api/webhooks/<int:webhook_id>/test", methods=["POST"])
+@api.route("/api/webhooks/<int:webhook_id>/test", methods=["POST"])
 def test_webhook(webhook_id):
     session = get_session()
     try:
@@ -480,10 +921,10 @@ def test_webhook(webhook_id):
 
 
 # ---------- Health & Stats ----------
-@app.route("/api/health", methods=["GET"])
+@api.route("/api/health", methods=["GET"])
 def health():
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
         return jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
     except Exception as e:
@@ -491,9 +932,15 @@ def health():
         return jsonify({"status": "unhealthy", "error": str(e)}), 503
 
 
-@app.route("/api/products/stats", methods=["GET"])
+@api.route("/api/health/pool", methods=["GET"])
+def health_pool():
+    # Per-process; used by loadtest.py to sample pool saturation
+    return jsonify({"pid": os.getpid(), "engines": pool_status()})
+
+
+@api.route("/api/products/stats", methods=["GET"])
 def product_stats():
-    session = get_session()
+    session = read_session()
     try:
         total_products = session.query(func.count(Product.id)).scalar() or 0
         active_products = session.query(func.count(Product.id)).filter(Product.active == True).scalar() or 0
@@ -510,18 +957,50 @@ def product_stats():
         safe_close(session)
 
 
+@api.route("/api/cache/stats", methods=["GET"])
+def product_cache_stats():
+    # Per-process figures; each web worker keeps its own local tier
+    return jsonify(cache_stats())
+
+
 # ---------- Error handlers ----------
-@app.errorhandler(413)
+@api.app_errorhandler(413)
 def payload_too_large(e):
     return jsonify({"error": "File too large"}), 413
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def handle_500(e):
     logger.exception("Internal server error")
     return jsonify({"error": "Internal server error"}), 500
 
 
+# ---------- App factory ----------
+def create_app(config=None):
+    app = Flask(__name__)
+    if config:
+        app.config.update(config)
+
+    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    logging.basicConfig(level=logging.INFO)
+
+    app.register_blueprint(api)
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    # Keeps `gunicorn app:app` working without building the app on import
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
-    Base.metadata.create_all(engine)
-    app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
+    Base.metadata.create_all(get_engine())
+    create_app().run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
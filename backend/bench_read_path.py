@@ -0,0 +1,100 @@
+"""Benchmark GET /api/products: ORM + to_dict() + jsonify vs the Core/orjson path.
+
+Runs in-process against DATABASE_URL (optionally seeding the load-test
+catalog first) and times whole requests, database time included, at each
+page size. Prints one JSON object; compare runs between commits. fast_br
+is only measured when the optional brotli package is installed.
+
+    python bench_read_path.py --seed 20000 --runs 20
+"""
+import argparse
+import json
+import statistics
+import time
+
+PAGE_SIZES = (20, 500, 5000)
+
+
+def legacy_list(session, per_page):
+    """The previous list_products body: ORM hydration, to_dict() per row, jsonify."""
+    from flask import jsonify
+    from models.product import Product
+
+    query = session.query(Product)
+    total = query.count()
+    items = query.offset(0).limit(per_page).all()
+    return jsonify(
+        {
+            "data": [p.to_dict() for p in items],
+            "total": total,
+            "page": 1,
+            "per_page": per_page,
+            "pages": (total + per_page - 1) // per_page,
+        }
+    )
+
+
+def time_runs(fn, runs):
+    fn()  # warm-up: connection checkout, statement cache
+    samples = []
+    size = 0
+    for _ in range(runs):
+        t = time.perf_counter()
+        size = len(fn().get_data())
+        samples.append(time.perf_counter() - t)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(sorted(samples)[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0, help="(re)seed this many load-test products first")
+    parser.add_argument("--page-size", type=int, action="append", help=f"default: {PAGE_SIZES}")
+    args = parser.parse_args()
+
+    from app import create_app, list_products
+    from utils.fast_json import brotli
+    from utils.session_manager import get_session, safe_close
+
+    if args.seed:
+        from loadtest import seed_catalog
+        seed_catalog(args.seed)
+
+    app = create_app()
+    results = {}
+    for per_page in args.page_size or PAGE_SIZES:
+        query = f"/api/products?per_page={per_page}"
+
+        def legacy():
+            session = get_session()
+            try:
+                with app.test_request_context(query):
+                    return legacy_list(session, per_page)
+            finally:
+                safe_close(session)
+
+        def fast(encoding=None):
+            headers = {"Accept-Encoding": encoding} if encoding else {}
+            with app.test_request_context(query, headers=headers):
+                return list_products()
+
+        legacy_stats = time_runs(legacy, args.runs)
+        fast_stats = time_runs(fast, args.runs)
+        results[str(per_page)] = {
+            "legacy": legacy_stats,
+            "fast": fast_stats,
+            "fast_gzip": time_runs(lambda: fast("gzip"), args.runs),
+            # Without brotli, "br" requests are served uncompressed: nothing to measure
+            "fast_br": time_runs(lambda: fast("br"), args.runs) if brotli is not None else "skipped: brotli not installed",
+            "speedup": round(legacy_stats["median_ms"] / fast_stats["median_ms"], 2)
+            if fast_stats["median_ms"] else None,
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Startup-time benchmark for the web process and the Celery worker.
+
+Each measurement runs in a fresh interpreter so nothing is cached between
+runs. Prints one JSON object; compare runs between commits.
+
+    python bench_startup.py --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+WEB_IMPORT = """
+import time
+t = time.perf_counter()
+import app
+print(time.perf_counter() - t)
+"""
+
+WEB_FIRST_REQUEST = """
+import time
+t = time.perf_counter()
+from app import create_app
+client = create_app().test_client()
+res = client.get("/api/health")
+assert res.status_code in (200, 503), res.status_code
+print(time.perf_counter() - t)
+"""
+
+WORKER_IMPORT = """
+import time
+t = time.perf_counter()
+from celery_app import celery
+celery.loader.import_default_modules()
+print(time.perf_counter() - t)
+"""
+
+WORKER_FIRST_TASK = """
+import time
+t = time.perf_counter()
+from celery_app import celery
+celery.loader.import_default_modules()
+celery.tasks["tasks.import_tasks.dispatch_imports"].apply().get()
+print(time.perf_counter() - t)
+"""
+
+SCENARIOS = {
+    "web_cold_import": WEB_IMPORT,
+    "web_first_request": WEB_FIRST_REQUEST,
+    "worker_cold_import": WORKER_IMPORT,
+    "worker_first_task": WORKER_FIRST_TASK,
+}
+
+
+def measure(code, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return {
+        "runs": runs,
+        "min_ms": round(min(samples) * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", choices=sorted(SCENARIOS), action="append")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or SCENARIOS:
+        try:
+            results[name] = measure(SCENARIOS[name], args.runs)
+        except subprocess.CalledProcessError as e:
+            results[name] = {"error": (e.stderr or "").strip().splitlines()[-1:]}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 from celery import Celery
+from celery.signals import worker_process_init
 from config.config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
 
 celery = Celery(
     "celery_worker",
     broker=CELERY_BROKER_URL,
     backend=CELERY_RESULT_BACKEND,
-    include=["tasks.import_tasks"],
+    include=["tasks.import_tasks", "tasks.bulk_tasks", "tasks.maintenance_tasks"],
 )
 
 celery.conf.update(
@@ -13,8 +14,40 @@ celery.conf.update(
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
+    task_default_queue="default",
+    # Imports and bulk jobs never share workers with short background tasks.
+    # Run e.g. `-Q imports_small`, `-Q imports` and `-Q bulk,default` workers.
+    task_routes={
+        "tasks.import_tasks.process_csv_import": {"queue": "imports"},
+        "tasks.import_tasks.dispatch_imports": {"queue": "default"},
+        "tasks.bulk_tasks.*": {"queue": "bulk"},
+        "tasks.maintenance_tasks.*": {"queue": "bulk"},
+    },
+    # Long imports must not be prefetched behind each other on one worker
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        "dispatch-queued-imports": {
+            "task": "tasks.import_tasks.dispatch_imports",
+            "schedule": 30.0,
+        },
+        "compact-change-feed": {
+            "task": "tasks.maintenance_tasks.compact_change_feed",
+            "schedule": 24 * 60 * 60.0,
+        },
+        "cleanup-uploads": {
+            "task": "tasks.maintenance_tasks.cleanup_uploads",
+            "schedule": 60 * 60.0,
+        },
+    },
 )
 
+
+@worker_process_init.connect
+def _init_worker_db(**_):
+    from utils.session_manager import configure_for_worker
+    configure_for_worker()
+
+
 if __name__ == "__main__":
     import sys
     argv = ["worker"] + sys.argv[1:]
@@ -32,3 +32,83 @@ CELERY_BROKER_URL = os.getenv(
 CELERY_RESULT_BACKEND = os.getenv(
     "REDIS_URL"
 )
+
+# ---------------- DATABASE ROUTING ----------------
+# Optional read replica. When unset, reads go to the primary.
+SQLALCHEMY_REPLICA_URI = os.getenv("DATABASE_REPLICA_URL")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
+DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", 20))
+DB_REPLICA_MAX_OVERFLOW = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", 10))
+
+# Celery worker processes only need a couple of connections each
+WORKER_DB_POOL_SIZE = int(os.getenv("WORKER_DB_POOL_SIZE", 2))
+WORKER_DB_MAX_OVERFLOW = int(os.getenv("WORKER_DB_MAX_OVERFLOW", 2))
+
+# After a write, the same client reads from the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
+# ---------------- IMPORT SCHEDULER ----------------
+IMPORT_MAX_CONCURRENT = int(os.getenv("IMPORT_MAX_CONCURRENT", 2))
+IMPORT_MAX_PER_SOURCE = int(os.getenv("IMPORT_MAX_PER_SOURCE", 1))
+# Files up to this size go to the small-import queue and may use reserved slots
+IMPORT_SMALL_FILE_MB = float(os.getenv("IMPORT_SMALL_FILE_MB", 5))
+IMPORT_SMALL_RESERVED_SLOTS = int(os.getenv("IMPORT_SMALL_RESERVED_SLOTS", 1))
+# Running jobs not updated for this long no longer hold a slot
+IMPORT_STALE_MINUTES = int(os.getenv("IMPORT_STALE_MINUTES", 60))
+
+# ---------------- PRODUCT CACHE ----------------
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", os.getenv("REDIS_URL"))
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", 100000))
+PRODUCT_CACHE_LOCAL_TTL = int(os.getenv("PRODUCT_CACHE_LOCAL_TTL", 30))
+PRODUCT_CACHE_REDIS_TTL = int(os.getenv("PRODUCT_CACHE_REDIS_TTL", 300))
+# Unknown SKUs are cached too, briefly
+PRODUCT_CACHE_NEGATIVE_TTL = int(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", 10))
+
+# ---------------- BATCH LOOKUP ----------------
+LOOKUP_MAX_SKUS = int(os.getenv("LOOKUP_MAX_SKUS", 5000))
+LOOKUP_CHUNK_SIZE = int(os.getenv("LOOKUP_CHUNK_SIZE", 1000))
+
+# ---------------- CHANGE FEED ----------------
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", 14))
+# Entries older than this keep only the latest change per SKU
+CHANGE_FEED_COMPACT_AFTER_HOURS = int(os.getenv("CHANGE_FEED_COMPACT_AFTER_HOURS", 24))
+CHANGE_FEED_MAX_LIMIT = int(os.getenv("CHANGE_FEED_MAX_LIMIT", 10000))
+
+# ---------------- UPLOAD STORAGE ----------------
+UPLOAD_STORAGE = os.getenv("UPLOAD_STORAGE", "local")  # local | s3
+UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_PREFIX = os.getenv("S3_PREFIX", "uploads/")
+# Set for MinIO or any other S3-compatible endpoint
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+# Uploads of finished jobs are removed by the cleanup task after this long;
+# failed jobs keep theirs longer so they can be retried
+UPLOAD_RETENTION_HOURS = int(os.getenv("UPLOAD_RETENTION_HOURS", 24))
+FAILED_UPLOAD_RETENTION_HOURS = int(os.getenv("FAILED_UPLOAD_RETENTION_HOURS", 168))
+
+# ---------------- DRY RUN ----------------
+# Processes used to validate a dry_run upload (default: all cores)
+DRY_RUN_WORKERS = int(os.getenv("DRY_RUN_WORKERS", os.cpu_count() or 1))
+# Files are split into ranges of at least this size; smaller files run in-process
+DRY_RUN_MIN_CHUNK_MB = float(os.getenv("DRY_RUN_MIN_CHUNK_MB", 4))
+
+# ---------------- IMPORT BATCHING ----------------
+# The importer sizes each flush between these bounds
+IMPORT_BATCH_MIN = int(os.getenv("IMPORT_BATCH_MIN", 500))
+IMPORT_BATCH_MAX = int(os.getenv("IMPORT_BATCH_MAX", 50000))
+IMPORT_BATCH_INITIAL = int(os.getenv("IMPORT_BATCH_INITIAL", 4000))
+# Aim for flushes (write + commit) of about this long
+IMPORT_TARGET_FLUSH_SECONDS = float(os.getenv("IMPORT_TARGET_FLUSH_SECONDS", 1.0))
+# Cap on raw row data buffered per batch
+IMPORT_BATCH_MAX_MB = float(os.getenv("IMPORT_BATCH_MAX_MB", 32))
+# Worker RSS ceiling; batches shrink as it is approached (0 disables)
+IMPORT_MEMORY_LIMIT_MB = int(os.getenv("IMPORT_MEMORY_LIMIT_MB", 1024))
+
+# ---------------- RESPONSES ----------------
+# gzip / brotli (if installed) for JSON read responses, negotiated via Accept-Encoding
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() in ("true", "1", "yes")
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
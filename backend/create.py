@@ -4,7 +4,11 @@ from models.base import Base
 
 # Import all your models so Base knows about them
 import models.import_job
+import models.import_job_row
+import models.bulk_job
+import models.mapping_profile
 import models.product
+import models.product_change
 import models.webhook
 
 
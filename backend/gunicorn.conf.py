@@ -0,0 +1,13 @@
+# gunicorn.conf.py
+import os
+
+wsgi_app = "app:create_app()"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+# Import the app once in the master and fork workers from it. Safe because
+# the app factory opens no connections, and utils.session_manager drops any
+# pooled connections inherited across a fork.
+preload_app = True
+
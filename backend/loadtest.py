@@ -0,0 +1,342 @@
+"""HTTP load test for the API with per-endpoint latency percentiles.
+
+Seeds a local PostgreSQL (DATABASE_URL) with a synthetic catalog, registers
+a webhook pointing at a local stub receiver, then drives mixed traffic and
+holds SSE streams open against a running server. Prints one JSON report;
+compare runs between commits.
+
+    python loadtest.py --seed 200000 --duration 60 --concurrency 32 --sse 50 \\
+        --output loadtest-$(git rev-parse --short HEAD).json
+
+Use --serve to run the app in-process (werkzeug, threaded) instead of
+against --base-url.
+"""
+import argparse
+import io
+import json
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+LT_PREFIX = "lt-"
+LT_JOB_STATUS = "loadtest"  # never terminal, never picked up by the scheduler
+WORDS = ["acme", "techpro", "styleco", "fitgear", "premium", "deluxe", "ultra", "basic", "garden", "office"]
+
+# name -> weight
+DEFAULT_MIX = {
+    "list": 25,
+    "list_deep": 10,
+    "search": 15,
+    "stats": 10,
+    "get_sku": 30,
+    "update": 10,
+}
+
+
+# ---------------- Seeding ----------------
+def seed_catalog(count):
+    """Replace the load-test catalog with `count` rows via COPY."""
+    from utils.session_manager import get_engine
+
+    conn = get_engine().raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM products WHERE lower(sku) LIKE %s", (LT_PREFIX + "%",))
+        now = datetime.utcnow().isoformat()
+        chunk = 100_000
+        for start in range(0, count, chunk):
+            buf = io.StringIO()
+            for i in range(start, min(start + chunk, count)):
+                words = " ".join(random.sample(WORDS, 3))
+                buf.write(
+                    f"{LT_PREFIX}{i:08d},{words} item {i},{words} description,"
+                    f"{random.uniform(5, 9999):.2f},{random.random() < 0.75},{now},{now}\n"
+                )
+            buf.seek(0)
+            cur.copy_expert(
+                "COPY products (sku, name, description, price, active, created_at, updated_at) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buf,
+            )
+        conn.commit()
+        cur.execute("ANALYZE products")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def create_sse_job():
+    from models.import_job import ImportJob
+    from utils.session_manager import get_session, safe_close
+
+    session = get_session()
+    try:
+        job = ImportJob(status=LT_JOB_STATUS, file_path="loadtest", file_size_mb=0.0)
+        session.add(job)
+        session.commit()
+        return job.id
+    finally:
+        safe_close(session)
+
+
+def delete_sse_job(job_id):
+    from models.import_job import ImportJob
+    from utils.session_manager import get_session, safe_close
+
+    session = get_session()
+    try:
+        session.query(ImportJob).filter(ImportJob.id == job_id).delete()
+        session.commit()
+    finally:
+        safe_close(session)
+
+
+# ---------------- Webhook stub ----------------
+class _StubHandler(BaseHTTPRequestHandler):
+    received = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with _StubHandler.lock:
+            _StubHandler.received += 1
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_app(port):
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    server = make_server("127.0.0.1", port, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------------- Traffic ----------------
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # endpoint -> [(latency_s, ok)]
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, latency, ok):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append((latency, ok))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[k] * 1000, 2)
+
+
+def summarize(samples, elapsed):
+    report = {}
+    for endpoint, rows in sorted(samples.items()):
+        latencies = sorted(lat for lat, _ in rows)
+        errors = sum(1 for _, ok in rows if not ok)
+        report[endpoint] = {
+            "requests": len(rows),
+            "errors": errors,
+            "rps": round(len(rows) / elapsed, 2) if elapsed else None,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        }
+    return report
+
+
+def make_request(http, base, endpoint, catalog_size, pages):
+    sku = f"{LT_PREFIX}{random.randrange(catalog_size):08d}"
+    if endpoint == "list":
+        return http.get(f"{base}/products", params={"page": random.randint(1, 5), "per_page": 20})
+    if endpoint == "list_deep":
+        return http.get(f"{base}/products", params={"page": random.randint(1, max(pages, 1)), "per_page": 20})
+    if endpoint == "search":
+        return http.get(f"{base}/products", params={"search": random.choice(WORDS), "per_page": 20})
+    if endpoint == "stats":
+        return http.get(f"{base}/products/stats")
+    if endpoint == "get_sku":
+        return http.get(f"{base}/products/{sku}")
+    if endpoint == "update":
+        return http.put(f"{base}/products/{sku}", json={"price": round(random.uniform(5, 9999), 2)})
+    raise ValueError(endpoint)
+
+
+def worker(base, mix, catalog_size, stop, recorder):
+    http = requests.Session()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    pages = catalog_size // 20
+    while not stop.is_set():
+        endpoint = random.choices(names, weights)[0]
+        t = time.perf_counter()
+        try:
+            res = make_request(http, base, endpoint, catalog_size, pages)
+            ok = res.status_code < 400
+        except requests.RequestException:
+            ok = False
+        recorder.add(endpoint, time.perf_counter() - t, ok)
+
+
+def sse_client(base, job_id, stop, recorder, responses):
+    t = time.perf_counter()
+    try:
+        res = requests.get(f"{base}/imports/{job_id}/status-stream", stream=True, timeout=(10, None))
+        recorder.add("sse_connect", time.perf_counter() - t, res.status_code < 400)
+        responses.append(res)
+        for _ in res.iter_lines():
+            if stop.is_set():
+                break
+    except Exception:
+        if not stop.is_set():
+            recorder.add("sse_connect", time.perf_counter() - t, False)
+
+
+def pool_sampler(base, stop, interval, samples):
+    http = requests.Session()
+    while not stop.wait(interval):
+        try:
+            samples.append(http.get(f"{base}/health/pool", timeout=5).json())
+        except Exception:
+            pass
+
+
+def summarize_pool(samples):
+    engines = {}
+    for sample in samples:
+        for name, st in sample.get("engines", {}).items():
+            agg = engines.setdefault(name, {"samples": 0, "max_checked_out": 0, "saturated_samples": 0})
+            agg["samples"] += 1
+            agg["max_checked_out"] = max(agg["max_checked_out"], st["checked_out"])
+            agg["capacity"] = st["pool_size"] + st["max_overflow"]
+            agg["saturated_samples"] += int(st["saturated"])
+    for agg in engines.values():
+        agg["saturated_ratio"] = round(agg["saturated_samples"] / agg["samples"], 4)
+    return engines
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5000/api")
+    parser.add_argument("--serve", action="store_true", help="run the app in-process")
+    parser.add_argument("--serve-port", type=int, default=5055)
+    parser.add_argument("--seed", type=int, default=0, help="catalog size to (re)seed; 0 keeps existing rows")
+    parser.add_argument("--catalog-size", type=int, default=None, help="existing catalog size when not seeding")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sse", type=int, default=20, help="concurrent SSE streams")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help="JSON {endpoint: weight}")
+    parser.add_argument("--stub-port", type=int, default=5099)
+    parser.add_argument("--pool-interval", type=float, default=0.5)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    if args.seed:
+        t = time.perf_counter()
+        seed_catalog(args.seed)
+        print(f"Seeded {args.seed:,} products in {time.perf_counter() - t:.1f}s")
+    catalog_size = args.seed or args.catalog_size or 1000
+
+    base = args.base_url.rstrip("/")
+    app_server = None
+    if args.serve:
+        app_server = start_app(args.serve_port)
+        base = f"http://127.0.0.1:{args.serve_port}/api"
+
+    stub = start_stub(args.stub_port)
+    webhook = requests.post(
+        f"{base}/webhooks",
+        json={"url": f"http://127.0.0.1:{args.stub_port}/hook", "event_type": "product.updated"},
+    ).json()
+    sse_job = create_sse_job() if args.sse else None
+
+    recorder = Recorder()
+    stop = threading.Event()
+    pool_samples = []
+    sse_responses = []
+    threads = [threading.Thread(target=pool_sampler, args=(base, stop, args.pool_interval, pool_samples))]
+    threads += [
+        threading.Thread(target=sse_client, args=(base, sse_job, stop, recorder, sse_responses))
+        for _ in range(args.sse)
+    ]
+    threads += [
+        threading.Thread(target=worker, args=(base, args.mix, catalog_size, stop, recorder))
+        for _ in range(args.concurrency)
+    ]
+
+    started = time.perf_counter()
+    for th in threads:
+        th.daemon = True
+        th.start()
+    time.sleep(args.duration)
+    stop.set()
+    elapsed = time.perf_counter() - started
+
+    for res in sse_responses:
+        res.close()
+    for th in threads:
+        th.join(timeout=5)
+
+    try:
+        requests.delete(f"{base}/webhooks/{webhook['id']}")
+    except Exception:
+        pass
+    if sse_job:
+        delete_sse_job(sse_job)
+    stub.shutdown()
+    if app_server:
+        app_server.shutdown()
+
+    total = sum(len(v) for k, v in recorder.samples.items() if k != "sse_connect")
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": {
+            "catalog_size": catalog_size,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "sse_streams": args.sse,
+            "mix": args.mix,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": summarize(recorder.samples, elapsed),
+        "webhooks_received": _StubHandler.received,
+        "db_pool": summarize_pool(pool_samples),
+    }
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out)
+
+
+if __name__ == "__main__":
+    main()
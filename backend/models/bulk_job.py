@@ -0,0 +1,40 @@
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, Text, DateTime
+from models.base import Base
+
+
+class BulkJob(Base):
+    __tablename__ = "bulk_jobs"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    operation = Column(String(50), nullable=False)  # delete | set_active | adjust_price
+    status = Column(String(50), nullable=False, default="queued")
+
+    filters = Column(Text, nullable=True)  # JSON
+    params = Column(Text, nullable=True)  # JSON
+
+    total_rows = Column(Integer, default=0, nullable=False)
+    processed_rows = Column(Integer, default=0, nullable=False)
+
+    error_message = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        progress = int((self.processed_rows / self.total_rows * 100)) if self.total_rows > 0 else 0
+        return {
+            "job_id": self.id,
+            "operation": self.operation,
+            "status": self.status,
+            "filters": json.loads(self.filters) if self.filters else {},
+            "params": json.loads(self.params) if self.params else {},
+            "total_rows": self.total_rows,
+            "processed_rows": self.processed_rows,
+            "progress": progress,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "error_message": self.error_message
+        }
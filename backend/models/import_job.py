@@ -1,6 +1,7 @@
+import json
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Text, Float, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, Text, Float, DateTime, Index
 from models.base import Base
 
 
@@ -9,33 +10,60 @@ class ImportJob(Base):
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     status = Column(String(50), nullable=False, default="queued")
+    mode = Column(String(20), nullable=False, default="upsert")  # upsert | full_sync | delta | partial | dry_run
+    missing_action = Column(String(20), nullable=True)  # deactivate | delete (full_sync / delta)
 
     total_rows = Column(Integer, default=0, nullable=False)
     processed_rows = Column(Integer, default=0, nullable=False)
     success_count = Column(Integer, default=0, nullable=False)
     error_count = Column(Integer, default=0, nullable=False)
+    unchanged_count = Column(Integer, default=0, nullable=False)  # delta: rows skipped
+    removed_count = Column(Integer, default=0, nullable=False)  # SKUs missing from the feed
+    skipped_count = Column(Integer, default=0, nullable=False)  # partial: unknown SKUs
+    predicted_created = Column(Integer, nullable=True)  # dry_run only
+    predicted_updated = Column(Integer, nullable=True)  # dry_run only
 
     error_message = Column(Text, nullable=True)
+    report = Column(Text, nullable=True)  # dry_run: full JSON validation report
+    metrics = Column(Text, nullable=True)  # JSON: batch sizes chosen, flush latency, peak RSS
 
     file_path = Column(String(500), nullable=False)
     file_size_mb = Column(Float, default=0.0, nullable=False)
+    file_purged = Column(Boolean, default=False, nullable=False)  # upload removed by cleanup
+    source = Column(String(100), nullable=True)  # feed / supplier identifier
+    mapping_profile_id = Column(BigInteger, nullable=True)  # NULL = sniff headers/delimiter
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        Index("ix_import_jobs_status_size", "status", "file_size_mb", "created_at"),
+    )
+
     def to_dict(self):
         progress = int((self.processed_rows / self.total_rows * 100)) if self.total_rows > 0 else 0
         return {
             "job_id": self.id,
             "status": self.status,
+            "mode": self.mode,
+            "missing_action": self.missing_action,
             "total_rows": self.total_rows,
             "processed_rows": self.processed_rows,
             "success_count": self.success_count,
             "error_count": self.error_count,
+            "unchanged_count": self.unchanged_count,
+            "removed_count": self.removed_count,
+            "skipped_count": self.skipped_count,
+            "predicted_created": self.predicted_created,
+            "predicted_updated": self.predicted_updated,
             "progress": progress,
             "file_path": self.file_path,
             "file_size_mb": round(self.file_size_mb, 2),
+            "file_purged": self.file_purged,
+            "source": self.source,
+            "mapping_profile_id": self.mapping_profile_id,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "metrics": json.loads(self.metrics) if self.metrics else None,
             "error_message": self.error_message
         }
\ No newline at end of file
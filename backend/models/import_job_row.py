@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, BigInteger
+from models.base import Base
+
+
+class ImportJobRow(Base):
+    """SKUs (and a content hash) seen by a full-sync or delta import.
+
+    Used for the full-sync anti-join and kept as the source's snapshot for
+    the next delta import. UNLOGGED: losing it after a crash only means the
+    next delta import applies every row.
+    """
+    __tablename__ = "import_job_rows"
+
+    job_id = Column(String(36), primary_key=True)
+    sku = Column(String(255), primary_key=True)  # lowercased
+    row_hash = Column(BigInteger, nullable=True)  # NULL for rows that failed validation
+
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, String, Text, DateTime
+from models.base import Base
+
+
+class MappingProfile(Base):
+    """How to read one supplier's CSV: column names, dialect and value formats."""
+    __tablename__ = "mapping_profiles"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+    columns = Column(Text, nullable=True)  # JSON {product field: source header}
+    delimiter = Column(String(5), nullable=True)  # NULL = sniff
+    encoding = Column(String(50), nullable=False, default="utf-8-sig")
+    true_values = Column(Text, nullable=True)  # JSON list, NULL = defaults
+    decimal_separator = Column(String(1), nullable=False, default=".")
+    thousands_separator = Column(String(1), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "columns": json.loads(self.columns) if self.columns else {},
+            "delimiter": self.delimiter,
+            "encoding": self.encoding,
+            "true_values": json.loads(self.true_values) if self.true_values else None,
+            "decimal_separator": self.decimal_separator,
+            "thousands_separator": self.thousands_separator,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -18,6 +18,13 @@ class Product(Base):
 
     __table_args__ = (
         Index('ix_products_sku_lower', func.lower(sku), unique=True),
+        # Sorted listings: (sort column, id) so ORDER BY ... LIMIT reads the index in order
+        Index('ix_products_price_id', price, id),
+        Index('ix_products_name_id', name, id),
+        Index('ix_products_updated_at_id', updated_at, id),
+        # The dashboard mostly browses active products
+        Index('ix_products_active_price_id', price, id, postgresql_where=(active == True)),
+        Index('ix_products_active_updated_at_id', updated_at, id, postgresql_where=(active == True)),
     )
 
     def to_dict(self):
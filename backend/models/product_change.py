@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index
+from models.base import Base
+
+
+class ProductChange(Base):
+    """Append-only product change log, read by downstream syncs via seq cursors."""
+    __tablename__ = "product_changes"
+
+    seq = Column(BigInteger, primary_key=True, autoincrement=True)
+    sku = Column(String(255), nullable=True)  # lowercased; NULL for "reset"
+    op = Column(String(20), nullable=False)  # upsert | delete | reset
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_product_changes_sku_seq", "sku", "seq"),
+    )
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "sku": self.sku,
+            "op": self.op,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None
+        }
+
+
+class ChangeFeedState(Base):
+    """Single row recording how far retention has pruned the feed."""
+    __tablename__ = "change_feed_state"
+
+    id = Column(Integer, primary_key=True)
+    pruned_through = Column(BigInteger, default=0, nullable=False)
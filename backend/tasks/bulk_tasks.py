@@ -0,0 +1,184 @@
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select, update, delete, func, text
+
+from celery_app import celery
+from utils.session_manager import get_session, safe_close
+from utils.product_query import product_filter_clauses
+from utils.bulk import strict_bool
+from utils.webhooks import trigger_webhooks
+from utils.product_cache import invalidate_skus, clear_product_cache
+from utils.change_feed import record_changes
+from models.bulk_job import BulkJob
+from models.product import Product
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------
+# SAFE progress update (session-isolated)
+# -------------------------------------------------
+def update_bulk_progress(job_id, status=None, processed_rows=None, total_rows=None, error_message=None):
+    session = get_session()
+    try:
+        job = session.get(BulkJob, job_id)
+        if not job:
+            return
+
+        if status is not None:
+            job.status = status
+        if processed_rows is not None:
+            job.processed_rows = processed_rows
+        if total_rows is not None:
+            job.total_rows = total_rows
+        if error_message is not None:
+            job.error_message = error_message
+
+        session.commit()
+    finally:
+        safe_close(session)
+
+
+def _price_expression(params):
+    value = Decimal(str(params["value"]))
+    mode = params.get("mode", "percent")
+    if mode == "set":
+        return value
+    if mode == "amount":
+        expr = Product.price + value
+    else:
+        expr = func.round(Product.price * (1 + value / 100), 2)
+    # Never push a price below zero
+    return func.greatest(expr, 0)
+
+
+def _batch_statement(operation, params, ids):
+    if operation == "delete":
+        return delete(Product).where(Product.id.in_(ids)).returning(Product.sku)
+
+    if operation == "set_active":
+        active = strict_bool(params["active"])
+        # Rows already in the target state are left alone (no feed entry, no index churn)
+        stmt = update(Product).where(Product.id.in_(ids), Product.active != active).values(active=active)
+    else:
+        stmt = update(Product).where(Product.id.in_(ids)).values(price=_price_expression(params))
+        if params.get("mode", "percent") != "set":
+            stmt = stmt.where(Product.price.isnot(None))
+    return stmt.values(updated_at=func.now()).returning(Product.sku)
+
+
+def claim_bulk_job(job_id):
+    """Atomically move a queued job to processing; False if it was cancelled or taken."""
+    session = get_session()
+    try:
+        claimed = (
+            session.query(BulkJob)
+            .filter(BulkJob.id == job_id, BulkJob.status == "queued")
+            .update({"status": "processing", "updated_at": datetime.utcnow()}, synchronize_session=False)
+        )
+        session.commit()
+        return claimed == 1
+    finally:
+        safe_close(session)
+
+
+# -------------------------------------------------
+# BULK OPERATION TASK
+# -------------------------------------------------
+@celery.task(bind=True)
+def process_bulk_operation(self, job_id):
+    session = get_session()
+
+    BATCH_SIZE = 2000
+
+    try:
+        # A job cancelled while queued must never start
+        if not claim_bulk_job(job_id):
+            return
+
+        job = session.get(BulkJob, job_id)
+        if not job:
+            return
+
+        operation = job.operation
+        filters = json.loads(job.filters) if job.filters else {}
+        params = json.loads(job.params) if job.params else {}
+        clauses = product_filter_clauses(**filters)
+
+        # Only an explicit "all" request may touch every product
+        if not clauses and params.get("all") is not True:
+            update_bulk_progress(job_id, status="failed", error_message="No filters given and \"all\" not set")
+            return
+
+        # ---------------- Fast path: full wipe ----------------
+        if operation == "delete" and not clauses:
+            total = session.query(func.count(Product.id)).scalar() or 0
+            update_bulk_progress(job_id, total_rows=total)
+            session.execute(text("TRUNCATE TABLE products"))
+            record_changes(session, [], op="reset")
+            session.commit()
+            clear_product_cache()
+            update_bulk_progress(job_id, status="completed", processed_rows=total)
+            _notify(operation, filters, params, total)
+            return
+
+        total = session.query(func.count(Product.id)).filter(*clauses).scalar() or 0
+        update_bulk_progress(job_id, total_rows=total, processed_rows=0)
+        session.commit()  # release the snapshot before batching
+
+        # ---------------- Keyset-ordered batches ----------------
+        processed = 0
+        last_id = 0
+        while True:
+            ids = session.execute(
+                select(Product.id)
+                .where(Product.id > last_id, *clauses)
+                .order_by(Product.id)
+                .limit(BATCH_SIZE)
+            ).scalars().all()
+            if not ids:
+                break
+
+            changed = session.execute(
+                _batch_statement(operation, params, ids),
+                execution_options={"synchronize_session": False},
+            ).scalars().all()
+            record_changes(session, changed, op="delete" if operation == "delete" else "upsert")
+            session.commit()
+            invalidate_skus(changed)
+
+            last_id = ids[-1]
+            processed += len(ids)
+
+            session.refresh(job)
+            if job.status == "cancelled":
+                update_bulk_progress(job_id, processed_rows=processed)
+                return
+
+            update_bulk_progress(job_id, processed_rows=processed)
+
+        update_bulk_progress(job_id, status="completed", processed_rows=processed)
+        _notify(operation, filters, params, processed)
+
+    except Exception as e:
+        session.rollback()
+        update_bulk_progress(job_id, status="failed", error_message=str(e))
+        raise
+
+    finally:
+        safe_close(session)
+
+
+def _notify(operation, filters, params, count):
+    event = "product.bulk_deleted" if operation == "delete" else "product.bulk_updated"
+    payload = {"operation": operation, "filters": filters, "params": params}
+    if operation == "delete":
+        payload["deleted_count"] = count
+    else:
+        payload["updated_count"] = count
+    try:
+        trigger_webhooks(event, payload)
+    except Exception:
+        logger.exception("Trigger webhooks (%s) failed", event)
@@ -1,12 +1,37 @@
 import csv
-import os
-from sqlalchemy import func
+import json
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import func, tuple_, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from celery_app import celery
 from utils.session_manager import get_session, safe_close
+from utils.import_scheduler import dispatch_queued_imports
+from utils.product_cache import invalidate_skus
+from utils.change_feed import record_changes
+from utils.csv_mapping import mapping_for_job, resolve_delimiter, skip_blank_rows, RowDecoder
+from utils.storage import get_storage, open_text
+from utils.dry_run import run_dry_run
+from utils.batch_sizer import AdaptiveBatchSizer
+from utils.import_sync import (
+    row_hash,
+    record_rows,
+    previous_snapshot_job_id,
+    unchanged_skus,
+    remove_absent_products,
+    remove_vanished_skus,
+    finalize_snapshot,
+    discard_rows,
+)
 from models.import_job import ImportJob
 from models.product import Product
 
+logger = logging.getLogger(__name__)
+
+ROW_ESTIMATE_SAMPLE_BYTES = 1024 * 1024
+
 
 # -------------------------------------------------
 # SAFE progress update (session-isolated)
@@ -19,6 +44,13 @@ def update_job_progress(
     error_count=None,
     error_message=None,
     total_rows=None,
+    unchanged_count=None,
+    removed_count=None,
+    skipped_count=None,
+    predicted_created=None,
+    predicted_updated=None,
+    report=None,
+    metrics=None,
 ):
     session = get_session()
     try:
@@ -38,12 +70,190 @@ def update_job_progress(
             job.error_message = error_message
         if total_rows is not None:
             job.total_rows = total_rows
+        if unchanged_count is not None:
+            job.unchanged_count = unchanged_count
+        if removed_count is not None:
+            job.removed_count = removed_count
+        if skipped_count is not None:
+            job.skipped_count = skipped_count
+        if predicted_created is not None:
+            job.predicted_created = predicted_created
+        if predicted_updated is not None:
+            job.predicted_updated = predicted_updated
+        if report is not None:
+            job.report = report
+        if metrics is not None:
+            job.metrics = json.dumps(metrics)
+
+        session.commit()
+    finally:
+        safe_close(session)
+
 
+def claim_job(job_id):
+    """Atomically move a scheduled job to parsing; False if someone else has it."""
+    session = get_session()
+    try:
+        claimed = (
+            session.query(ImportJob)
+            .filter(ImportJob.id == job_id, ImportJob.status == "scheduled")
+            .update({"status": "parsing"}, synchronize_session=False)
+        )
         session.commit()
+        return claimed == 1
     finally:
         safe_close(session)
 
 
+def count_rows(uri, encoding):
+    """Data rows in the upload. Exact for local files; for remote storage it
+    is estimated from the first MB so the file is only streamed once."""
+    if not get_storage(uri).remote:
+        with open_text(uri, encoding) as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    return estimate_rows(uri)
+
+
+def estimate_rows(uri):
+    storage = get_storage(uri)
+    size = storage.size(uri)
+    head = storage.read_range(uri, 0, ROW_ESTIMATE_SAMPLE_BYTES)
+    lines = head.count(b"\n")
+    if not lines or len(head) >= size:
+        return max(lines - 1, 0)
+    return max(int(size * lines / len(head)) - 1, 0)
+
+
+# -------------------------------------------------
+# Dry run (no writes)
+# -------------------------------------------------
+def dry_run_import(job_id, file_path, mapping, delimiter):
+    """Validate every row in parallel and predict created/updated counts."""
+    update_job_progress(
+        job_id,
+        status="processing",
+        total_rows=estimate_rows(file_path),
+        processed_rows=0,
+        success_count=0,
+        error_count=0,
+    )
+
+    def is_cancelled():
+        session = get_session()
+        try:
+            return session.query(ImportJob.status).filter(ImportJob.id == job_id).scalar() == "cancelled"
+        finally:
+            safe_close(session)
+
+    result = run_dry_run(
+        file_path,
+        mapping,
+        delimiter,
+        on_progress=lambda rows: update_job_progress(job_id, processed_rows=rows),
+        is_cancelled=is_cancelled,
+    )
+    if result is None:
+        update_job_progress(job_id, status="cancelled")
+        return
+
+    report = result.report()
+    update_job_progress(
+        job_id,
+        status="completed_with_errors" if result.errors else "completed",
+        error_message="\n".join(result.errors[:20]) if result.errors else None,
+        total_rows=report["rows"],
+        processed_rows=report["rows"],
+        success_count=report["valid_rows"],
+        error_count=report["error_rows"],
+        predicted_created=report["predicted_created"],
+        predicted_updated=report["predicted_updated"],
+        report=json.dumps(report),
+    )
+
+
+# -------------------------------------------------
+# Batch UPSERT
+# -------------------------------------------------
+def flush_products(session, rows):
+    """Upsert a batch keyed on lower(sku); returns the SKUs actually written.
+
+    Rows are written in SKU order so concurrent imports touching the same
+    SKUs take row locks in the same order and wait on each other instead
+    of deadlocking; each SKU ends up with whichever batch commits last.
+    Whole imports are serialized only per source (IMPORT_MAX_PER_SOURCE;
+    imports without a source count as one source).
+    Rows identical to what is stored are skipped.
+    """
+    if not rows:
+        return []
+
+    now = datetime.utcnow()
+    values = []
+    for sku in sorted(rows):
+        row = rows[sku]
+        row["created_at"] = now
+        row["updated_at"] = now
+        values.append(row)
+
+    stmt = pg_insert(Product).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[func.lower(Product.sku)],
+        set_={
+            "name": stmt.excluded.name,
+            "description": stmt.excluded.description,
+            "price": stmt.excluded.price,
+            "active": stmt.excluded.active,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=tuple_(Product.name, Product.description, Product.price, Product.active).is_distinct_from(
+            tuple_(stmt.excluded.name, stmt.excluded.description, stmt.excluded.price, stmt.excluded.active)
+        ),
+    ).returning(Product.sku)
+    changed = session.execute(stmt).scalars().all()
+    rows.clear()
+    return changed
+
+
+# -------------------------------------------------
+# Partial UPDATE (mode=partial)
+# -------------------------------------------------
+PARTIAL_COLUMN_TYPES = {"name": "text", "description": "text", "price": "numeric(12,2)", "active": "boolean"}
+
+
+def flush_partial(session, rows, fields):
+    """Set only `fields` on existing SKUs; returns (changed SKUs, unknown SKU count).
+
+    rows maps sku -> values aligned with fields. One set-based UPDATE per
+    batch joins typed arrays on lower(sku) (ix_products_sku_lower); no
+    other column is written, unknown SKUs are counted and skipped, and
+    rows already holding these values are left alone.
+    """
+    if not rows:
+        return [], 0
+
+    skus = sorted(rows)
+    params = {"skus": skus, "now": datetime.utcnow()}
+    for i, field in enumerate(fields):
+        params[field] = [rows[sku][i] for sku in skus]
+
+    arrays = "".join(f", CAST(:{f} AS {PARTIAL_COLUMN_TYPES[f]}[])" for f in fields)
+    columns = ", ".join(fields)
+    stmt = text(
+        f"WITH v AS (SELECT * FROM unnest(CAST(:skus AS text[]){arrays}) AS t(sku, {columns})),"
+        " changed AS ("
+        f"  UPDATE products AS p SET {', '.join(f'{f} = v.{f}' for f in fields)}, updated_at = :now"
+        "   FROM v WHERE lower(p.sku) = v.sku"
+        f"  AND ({', '.join('p.' + f for f in fields)}) IS DISTINCT FROM ({', '.join('v.' + f for f in fields)})"
+        "   RETURNING p.sku)"
+        " SELECT (SELECT count(*) FROM v WHERE NOT EXISTS"
+        "   (SELECT 1 FROM products p WHERE lower(p.sku) = v.sku)),"
+        " ARRAY(SELECT sku FROM changed)"
+    )
+    unknown, changed = session.execute(stmt, params).one()
+    rows.clear()
+    return changed, unknown
+
+
 # -------------------------------------------------
 # CSV IMPORT TASK (PRODUCTION SAFE)
 # -------------------------------------------------
@@ -51,22 +261,35 @@ def update_job_progress(
 def process_csv_import(self, job_id):
     session = get_session()
     job = None
+    finished = False
 
-    BATCH_SIZE = 4000
     PROGRESS_INTERVAL = 2000
     CANCEL_CHECK_INTERVAL = 1000
+    ROW_SAMPLE_INTERVAL = 64
 
     try:
         # ---------------- Load Job ----------------
+        if not claim_job(job_id):
+            return
+
         job = session.get(ImportJob, job_id)
         if not job:
             return
 
-        update_job_progress(job_id, status="parsing")
+        mode = job.mode or "upsert"
+        missing_action = job.missing_action or "deactivate"
+        track_rows = mode in ("full_sync", "delta")
+        partial = mode == "partial"
+
+        mapping = mapping_for_job(session, job)
+        delimiter = resolve_delimiter(job.file_path, mapping)
+
+        if mode == "dry_run":
+            dry_run_import(job_id, job.file_path, mapping, delimiter)
+            return
 
         # ---------------- Count rows ----------------
-        with open(job.file_path, "r", encoding="utf-8") as f:
-            total_rows = sum(1 for _ in f) - 1
+        total_rows = count_rows(job.file_path, mapping.encoding)
 
         update_job_progress(
             job_id,
@@ -75,25 +298,61 @@ def process_csv_import(self, job_id):
             processed_rows=0,
             success_count=0,
             error_count=0,
+            unchanged_count=0,
+            removed_count=0,
+            skipped_count=0,
         )
 
-        # ---------------- Preload existing products ----------------
-        existing_products = dict(
-            session.query(func.lower(Product.sku), Product).all()
-        )
+        # ---------------- Previous snapshot (delta) ----------------
+        # Compared batch by batch in SQL; never loaded into memory
+        snapshot_id = previous_snapshot_job_id(session, job) if mode == "delta" else None
+        session.commit()
 
-        to_insert = []
-        to_update = []
+        # sku -> row; a SKU repeated within a batch keeps its last row
+        pending = {}
+        # sku -> row hash staged for the full-sync anti-join / next snapshot
+        seen = {}
 
         success = 0
         error = 0
+        unchanged = 0
+        skipped = 0
         errors = []
+        rows_read = 0
+        sizer = AdaptiveBatchSizer()
+
+        def flush():
+            nonlocal skipped, unchanged
+            batch_rows = max(len(pending), len(seen))
+            started = time.perf_counter()
+            # ---- Delta: skip rows identical to the last snapshot ----
+            if snapshot_id and pending:
+                same = unchanged_skus(
+                    session, snapshot_id, {sku: seen[sku] for sku in pending if seen.get(sku) is not None}
+                )
+                for sku in same:
+                    del pending[sku]
+                unchanged += len(same)
+            if track_rows:
+                record_rows(session, job_id, seen)
+            if partial:
+                changed, unknown = flush_partial(session, pending, decoder.partial_fields)
+                skipped += unknown
+            else:
+                changed = flush_products(session, pending)
+            record_changes(session, changed)
+            session.commit()
+            invalidate_skus(changed)
+            if batch_rows:
+                sizer.observe(batch_rows, time.perf_counter() - started, rows_read)
 
         # ---------------- Process CSV ----------------
-        with open(job.file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+        with open_text(job.file_path, mapping.encoding) as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            decoder = RowDecoder(next(reader, []), mapping)
 
-            for idx, row in enumerate(reader, start=1):
+            for idx, row in enumerate(skip_blank_rows(reader), start=1):
+                rows_read = idx
 
                 # ---- Cancel check ----
                 if idx % CANCEL_CHECK_INTERVAL == 0:
@@ -102,80 +361,84 @@ def process_csv_import(self, job_id):
                         update_job_progress(job_id, status="cancelled")
                         return
 
-                sku = row.get("sku", "").strip().lower()
-                name = row.get("name", "").strip()
+                # ---- Batch flush (size adapts to latency, memory and row width) ----
+                if len(pending) >= sizer.size or len(seen) >= sizer.size:
+                    flush()
+                if idx % ROW_SAMPLE_INTERVAL == 0:
+                    sizer.sample_row(row)
 
-                if not sku or not name:
-                    error += 1
-                    if len(errors) < 20:
-                        errors.append(f"Row {idx}: Missing SKU or name")
-                    continue
+                # ---- Progress update ----
+                if idx % PROGRESS_INTERVAL == 0:
+                    update_job_progress(
+                        job_id,
+                        processed_rows=idx,
+                        success_count=success,
+                        error_count=error,
+                        unchanged_count=unchanged,
+                        skipped_count=skipped,
+                        metrics=sizer.metrics(),
+                    )
 
-                # ---- Price validation ----
-                price = None
-                raw_price = row.get("price", "").strip()
-                if raw_price:
-                    try:
-                        price = float(raw_price)
-                        if price < 0:
-                            raise ValueError
-                    except ValueError:
+                # ---- Partial: only the columns present in the file ----
+                if partial:
+                    sku, values, problem = decoder.decode_partial(row)
+                    if problem:
                         error += 1
                         if len(errors) < 20:
-                            errors.append(f"Row {idx}: Invalid price")
+                            errors.append(f"Row {idx}: {problem}")
                         continue
+                    success += 1
+                    pending[sku] = values
+                    continue
 
-                active = row.get("active", "true").lower() in (
-                    "true", "1", "yes", "y", "active"
-                )
+                sku, name, description, price, active, problem = decoder.decode(row)
 
-                # ---- UPSERT ----
-                if sku in existing_products:
-                    p = existing_products[sku]
-                    p.name = name
-                    p.description = row.get("description")
-                    p.price = price
-                    p.active = active
-                    to_update.append(p)
-                else:
-                    p = Product(
-                        sku=sku,
-                        name=name,
-                        description=row.get("description"),
-                        price=price,
-                        active=active,
-                    )
-                    to_insert.append(p)
-                    existing_products[sku] = p
+                # A SKU present in the feed is never treated as missing,
+                # even when the row itself is rejected
+                if track_rows and sku:
+                    seen[sku] = None
+
+                if problem:
+                    error += 1
+                    if len(errors) < 20:
+                        errors.append(f"Row {idx}: {problem}")
+                    continue
 
                 success += 1
 
-                # ---- Batch flush ----
-                if idx % BATCH_SIZE == 0:
-                    if to_insert:
-                        session.bulk_save_objects(to_insert)
-                    if to_update:
-                        session.bulk_save_objects(to_update)
-                    session.commit()
-                    to_insert.clear()
-                    to_update.clear()
+                if track_rows:
+                    seen[sku] = row_hash(name, description, price, active)
 
-                # ---- Progress update ----
-                if idx % PROGRESS_INTERVAL == 0:
-                    update_job_progress(
-                        job_id,
-                        processed_rows=idx,
-                        success_count=success,
-                        error_count=error,
-                    )
+                # ---- UPSERT ----
+                pending[sku] = {
+                    "sku": sku,
+                    "name": name,
+                    "description": description,
+                    "price": price,
+                    "active": active,
+                }
 
         # ---------------- Final flush ----------------
-        if to_insert:
-            session.bulk_save_objects(to_insert)
-        if to_update:
-            session.bulk_save_objects(to_update)
+        flush()
+        total_rows = rows_read  # exact, also when the count was estimated
 
-        session.commit()
+        # ---------------- Missing SKUs ----------------
+        removed = 0
+        session.refresh(job)
+        if job.status == "cancelled":
+            update_job_progress(job_id, status="cancelled")
+            return
+
+        # An empty or fully rejected feed must never wipe the catalog
+        if success:
+            if mode == "full_sync":
+                removed = remove_absent_products(session, job_id, missing_action)
+            elif mode == "delta" and snapshot_id:
+                removed = remove_vanished_skus(session, job_id, snapshot_id, missing_action)
+
+        if track_rows:
+            finalize_snapshot(session, job)
+        finished = True
 
         # ---------------- Final status ----------------
         if errors:
@@ -183,17 +446,27 @@ def process_csv_import(self, job_id):
                 job_id,
                 status="completed_with_errors",
                 error_message="\n".join(errors),
+                total_rows=total_rows,
                 processed_rows=total_rows,
                 success_count=success,
                 error_count=error,
+                unchanged_count=unchanged,
+                removed_count=removed,
+                skipped_count=skipped,
+                metrics=sizer.metrics(),
             )
         else:
             update_job_progress(
                 job_id,
                 status="completed",
+                total_rows=total_rows,
                 processed_rows=total_rows,
                 success_count=success,
                 error_count=error,
+                unchanged_count=unchanged,
+                removed_count=removed,
+                skipped_count=skipped,
+                metrics=sizer.metrics(),
             )
 
     except Exception as e:
@@ -206,6 +479,21 @@ def process_csv_import(self, job_id):
         raise
 
     finally:
+        if job and not finished and job.mode in ("full_sync", "delta"):
+            try:
+                discard_rows(session, job_id)
+            except Exception:
+                logger.exception("Discarding staged rows for import %s failed", job_id)
+        # The upload is kept (retries need it); tasks.maintenance_tasks.cleanup_uploads removes it
         safe_close(session)
-        if job and os.path.exists(job.file_path):
-            os.remove(job.file_path)
+        if job:
+            # A slot just freed up
+            try:
+                dispatch_queued_imports()
+            except Exception:
+                logger.exception("Dispatch after import %s failed", job_id)
+
+
+@celery.task
+def dispatch_imports():
+    return dispatch_queued_imports()
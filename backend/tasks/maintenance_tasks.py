@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime, timedelta
+
+from celery_app import celery
+from config.config import UPLOAD_RETENTION_HOURS, FAILED_UPLOAD_RETENTION_HOURS
+from models.import_job import ImportJob
+from utils.session_manager import get_session, safe_close
+from utils.change_feed import compact_changes, prune_changes
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "completed_with_errors", "cancelled")
+CLEANUP_BATCH_SIZE = 500
+
+
+@celery.task
+def compact_change_feed():
+    session = get_session()
+    try:
+        compacted = compact_changes(session)
+        pruned = prune_changes(session)
+        logger.info("Change feed: compacted %s, pruned %s entries", compacted, pruned)
+        return {"compacted": compacted, "pruned": pruned}
+    finally:
+        safe_close(session)
+
+
+@celery.task
+def cleanup_uploads():
+    """Delete uploads of finished jobs past retention.
+
+    Failed jobs keep their file longer so they can still be retried.
+    """
+    now = datetime.utcnow()
+    rules = [
+        (ImportJob.status.in_(FINISHED_STATUSES), now - timedelta(hours=UPLOAD_RETENTION_HOURS)),
+        (ImportJob.status == "failed", now - timedelta(hours=FAILED_UPLOAD_RETENTION_HOURS)),
+    ]
+    session = get_session()
+    purged = 0
+    try:
+        for status_clause, cutoff in rules:
+            last_id = ""  # ImportJob.id is a uuid string
+            while True:
+                jobs = (
+                    session.query(ImportJob)
+                    .filter(
+                        status_clause,
+                        ImportJob.file_purged.is_(False),
+                        ImportJob.updated_at < cutoff,
+                        ImportJob.id > last_id,
+                    )
+                    .order_by(ImportJob.id)
+                    .limit(CLEANUP_BATCH_SIZE)
+                    .all()
+                )
+                if not jobs:
+                    break
+                last_id = jobs[-1].id
+                for job in jobs:
+                    try:
+                        get_storage(job.file_path).delete(job.file_path)
+                    except Exception:
+                        logger.exception("Deleting upload for import %s failed", job.id)
+                        continue
+                    job.file_purged = True
+                    purged += 1
+                session.commit()
+                if len(jobs) < CLEANUP_BATCH_SIZE:
+                    break
+        logger.info("Purged %s import uploads", purged)
+        return {"purged": purged}
+    finally:
+        safe_close(session)
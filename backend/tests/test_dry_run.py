@@ -0,0 +1,76 @@
+import csv
+import io
+import itertools
+
+from utils.dry_run import plan_ranges, _record_start
+from utils.storage import get_storage
+
+# Quoted fields with embedded newlines, delimiters and escaped quotes
+ROWS = [["sku", "name", "description", "price", "active"]] + [
+    [f"sku-{i}", f"Item {i}", f'line one\nline "two", {i}\n\nend', f"{i}.99", "true"]
+    for i in range(200)
+]
+
+
+class SerialPool:
+    def starmap(self, func, iterable):
+        return list(itertools.starmap(func, iterable))
+
+
+def write_csv(tmp_path, rows=ROWS, raw_lines=()):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerows(rows[:2])
+    # Lines csv.writer would never produce, e.g. a literal quote in an unquoted field
+    buf.writelines(raw_lines)
+    writer.writerows(rows[2:])
+    path = tmp_path / "products.csv"
+    path.write_bytes(buf.getvalue().encode())
+    return str(path)
+
+
+def parse(data):
+    return list(csv.reader(io.StringIO(data.decode(), newline="")))
+
+
+def assert_ranges_match(path, counts):
+    data = open(path, "rb").read()
+    expected = parse(data)
+    for count in counts:
+        ranges = plan_ranges(path, len(data), count, SerialPool())
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        rows = [row for start, end in ranges for row in parse(data[start:end])]
+        assert rows == expected, count
+
+
+def test_ranges_split_between_records(tmp_path):
+    assert_ranges_match(write_csv(tmp_path), range(2, 12))
+
+
+def test_literal_quote_in_unquoted_field(tmp_path):
+    # csv.reader keeps a quote in the middle of an unquoted field as a
+    # literal; it must not flip the quoting state for the cuts after it
+    rows = ROWS[:1] + [
+        [f"sku-{i}", f"Item {i}", f'first line\n"quoted", {i}\nlast line', f"{i}.99", "true"]
+        for i in range(2000)
+    ]
+    path = write_csv(tmp_path, rows, ['sku-x,12" Pizza Pan,plain,5.00,true\n'])
+    assert len(parse(open(path, "rb").read())) == 2002
+    assert_ranges_match(path, range(2, 17))
+
+
+def test_record_start_skips_quoted_newlines(tmp_path):
+    path = write_csv(tmp_path)
+    data = open(path, "rb").read()
+    second = data.index(b"sku-1,")
+    # Inside the first record's quoted description: its newlines do not end it
+    inside = data.index(b"line one") + 2
+    assert _record_start(get_storage(path), path, inside, len(data), True) == second
+    # From the very start of a record, the cut falls after that record
+    assert _record_start(get_storage(path), path, second, len(data), False) == data.index(b"sku-2,")
+    # A literal quote in an unquoted field does not open a quoted one
+    path = write_csv(tmp_path, ROWS[:3], ['sku-x,12" Pizza Pan,plain,5.00,true\n'])
+    data = open(path, "rb").read()
+    start = data.index(b"sku-x,")
+    assert _record_start(get_storage(path), path, start, len(data), False) == data.index(b"sku-1,")
@@ -0,0 +1,31 @@
+-- Schema changes for databases created before these columns existed.
+--
+-- create.py (Base.metadata.create_all) creates missing tables but never
+-- alters existing ones. Every statement is idempotent; run after create.py:
+--
+--     psql "$DATABASE_URL" -f upgrade.sql
+
+-- import_jobs
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS mode VARCHAR(20) NOT NULL DEFAULT 'upsert';
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS missing_action VARCHAR(20);
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS unchanged_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS removed_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS skipped_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS predicted_created INTEGER;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS predicted_updated INTEGER;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS report TEXT;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS metrics TEXT;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS file_purged BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS source VARCHAR(100);
+ALTER TABLE import_jobs ADD COLUMN IF NOT EXISTS mapping_profile_id BIGINT;
+
+CREATE INDEX IF NOT EXISTS ix_import_jobs_status_size ON import_jobs (status, file_size_mb, created_at);
+
+-- products: sorted listings. CONCURRENTLY keeps the table writable during
+-- the build; it cannot run inside a transaction, so do not use psql -1.
+-- A build that fails leaves an INVALID index: DROP INDEX it and rerun.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_price_id ON products (price, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_name_id ON products (name, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_updated_at_id ON products (updated_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_active_price_id ON products (price, id) WHERE active;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_active_updated_at_id ON products (updated_at, id) WHERE active;
@@ -0,0 +1,122 @@
+# utils/batch_sizer.py
+"""Runtime flush sizing for process_csv_import.
+
+After every flush the next batch size is derived from how long the flush
+took (aiming at IMPORT_TARGET_FLUSH_SECONDS), the worker's RSS against
+IMPORT_MEMORY_LIMIT_MB and the average raw size of a row, always within
+[IMPORT_BATCH_MIN, IMPORT_BATCH_MAX]. A single step never more than
+doubles or halves the size, so one slow commit cannot swing it wildly.
+"""
+import os
+
+from config.config import (
+    IMPORT_BATCH_MIN,
+    IMPORT_BATCH_MAX,
+    IMPORT_BATCH_INITIAL,
+    IMPORT_TARGET_FLUSH_SECONDS,
+    IMPORT_BATCH_MAX_MB,
+    IMPORT_MEMORY_LIMIT_MB,
+)
+
+# Above this share of the memory limit batches stop growing, and shrink
+# while RSS keeps rising
+MEMORY_HIGH_WATER = 0.8
+MAX_HISTORY = 200
+
+
+def current_rss_mb():
+    """Resident set size of this process, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource  # peak rather than current, but better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except (ImportError, OSError):
+        return None
+
+
+class AdaptiveBatchSizer:
+    def __init__(self, minimum=IMPORT_BATCH_MIN, maximum=IMPORT_BATCH_MAX, initial=IMPORT_BATCH_INITIAL,
+                 target_seconds=IMPORT_TARGET_FLUSH_SECONDS, max_batch_mb=IMPORT_BATCH_MAX_MB,
+                 memory_limit_mb=IMPORT_MEMORY_LIMIT_MB):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.size = min(max(initial, self.minimum), self.maximum)
+        self.target_seconds = target_seconds
+        self.max_batch_bytes = max_batch_mb * 1024 * 1024
+        self.memory_limit_mb = memory_limit_mb
+
+        self._sampled_rows = 0
+        self._sampled_bytes = 0
+        self._last_rss = None
+        self.peak_rss_mb = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_seconds = 0.0
+        self.smallest = self.largest = self.size
+        self.history = [(0, self.size)]  # (rows read, size chosen from then on)
+
+    def sample_row(self, row):
+        """Feed an occasional parsed row so batches can be capped by bytes."""
+        self._sampled_rows += 1
+        self._sampled_bytes += sum(map(len, row)) + len(row)
+
+    @property
+    def avg_row_bytes(self):
+        return self._sampled_bytes / self._sampled_rows if self._sampled_rows else None
+
+    def observe(self, rows, seconds, rows_read):
+        """Record a flush of `rows` taking `seconds` and pick the next size."""
+        self.flushes += 1
+        self.flushed_rows += rows
+        self.flush_seconds += seconds
+        size = self.size
+
+        # Latency: only full-ish batches say anything about throughput
+        if rows >= self.size // 2 and seconds > 0:
+            ideal = rows * self.target_seconds / seconds
+            size = min(max(ideal, size / 2), size * 2)
+
+        # Memory
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, rss)
+            if self.memory_limit_mb and rss > self.memory_limit_mb * MEMORY_HIGH_WATER:
+                growing = self._last_rss is not None and rss > self._last_rss
+                size = min(size, self.size / 2 if growing or rss > self.memory_limit_mb else self.size)
+            self._last_rss = rss
+
+        # Row width
+        if self.avg_row_bytes:
+            size = min(size, self.max_batch_bytes / self.avg_row_bytes)
+
+        size = int(min(max(size, self.minimum), self.maximum))
+        if size != self.size:
+            self.size = size
+            self.smallest = min(self.smallest, size)
+            self.largest = max(self.largest, size)
+            if len(self.history) < MAX_HISTORY:
+                self.history.append((rows_read, size))
+        return size
+
+    def metrics(self):
+        return {
+            "batch_size": {
+                "initial": self.history[0][1],
+                "final": self.size,
+                "min": self.smallest,
+                "max": self.largest,
+                "bounds": [self.minimum, self.maximum],
+                "history": self.history,
+            },
+            "flushes": self.flushes,
+            "avg_flush_rows": round(self.flushed_rows / self.flushes) if self.flushes else None,
+            "avg_flush_ms": round(self.flush_seconds / self.flushes * 1000, 1) if self.flushes else None,
+            "avg_row_bytes": round(self.avg_row_bytes, 1) if self.avg_row_bytes else None,
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb else None,
+            "memory_limit_mb": self.memory_limit_mb or None,
+        }
@@ -0,0 +1,77 @@
+# utils/bulk.py
+from decimal import Decimal
+
+BULK_OPERATIONS = ("delete", "set_active", "adjust_price")
+BULK_FILTERS = ("active", "search", "min_price", "max_price", "updated_since")
+PRICE_MODES = ("percent", "amount", "set")
+TRUE_VALUES = ("true", "1", "yes")
+FALSE_VALUES = ("false", "0", "no")
+
+
+def strict_bool(value):
+    """A real boolean (or its usual spellings); ValueError for anything else."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+    raise ValueError(f"{value!r} is not a boolean")
+
+
+def clean_bulk_filters(filters):
+    """Return (filters, error).
+
+    Unknown keys and blank values are rejected rather than ignored: either
+    would silently widen the operation to the whole catalog.
+    """
+    if not isinstance(filters, dict):
+        return None, "filters must be an object"
+    unknown = sorted(k for k in filters if k not in BULK_FILTERS)
+    if unknown:
+        return None, f"Unknown filters: {', '.join(unknown)} (allowed: {', '.join(BULK_FILTERS)})"
+    blank = sorted(k for k, v in filters.items() if v is None or (isinstance(v, str) and not v.strip()))
+    if blank:
+        return None, f"Filters must not be blank: {', '.join(blank)}"
+
+    cleaned = dict(filters)
+    if "active" in cleaned:
+        try:
+            cleaned["active"] = strict_bool(cleaned["active"])
+        except ValueError:
+            return None, "filters.active must be true or false"
+    return cleaned, None
+
+
+def validate_bulk_request(operation, params):
+    """Return an error message, or None if the operation can be queued."""
+    if operation not in BULK_OPERATIONS:
+        return f"operation must be one of: {', '.join(BULK_OPERATIONS)}"
+    if not isinstance(params, dict):
+        return "params must be an object"
+
+    if operation == "set_active":
+        if "active" not in params:
+            return "params.active required"
+        try:
+            strict_bool(params["active"])
+        except ValueError:
+            return "params.active must be true or false"
+
+    if operation == "adjust_price":
+        if params.get("mode", "percent") not in PRICE_MODES:
+            return f"params.mode must be one of: {', '.join(PRICE_MODES)}"
+        try:
+            value = Decimal(str(params.get("value")))
+        except Exception:
+            return "params.value must be numeric"
+        if not value.is_finite():
+            return "params.value must be numeric"
+        if params.get("mode") == "set" and value < 0:
+            return "params.value must be >= 0"
+
+    return None
@@ -0,0 +1,109 @@
+# utils/change_feed.py
+from datetime import datetime, timedelta
+from sqlalchemy import text, func, select, insert
+
+from config.config import CHANGE_FEED_RETENTION_DAYS, CHANGE_FEED_COMPACT_AFTER_HOURS
+from models.product_change import ProductChange, ChangeFeedState
+
+# Arbitrary constant. Writers hold it from inserting their changes until
+# commit, so sequence numbers become visible in order and a reader polling
+# `seq > cursor` can never skip an entry committed late.
+FEED_LOCK_KEY = 7_301_034
+PRUNE_BATCH_SIZE = 10000
+
+
+def record_changes(session, skus, op="upsert"):
+    """Append changes in the caller's transaction. Call right before commit."""
+    if op != "reset":
+        skus = [s.lower() for s in skus if s]
+        if not skus:
+            return
+    # Pending ORM writes must hit their row locks before we take the feed lock
+    session.flush()
+    session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": FEED_LOCK_KEY})
+    now = datetime.utcnow()
+    if op == "reset":
+        rows = [{"sku": None, "op": op, "changed_at": now}]
+    else:
+        rows = [{"sku": sku, "op": op, "changed_at": now} for sku in skus]
+    session.execute(insert(ProductChange), rows)
+
+
+def read_changes(session, since, limit):
+    """Return (entries, next_cursor, has_more) or None when the cursor was pruned."""
+    state = session.get(ChangeFeedState, 1)
+    if state and since < state.pruned_through:
+        return None
+
+    # Plain rows rather than ORM objects; changed_at stays a datetime for the JSON layer
+    rows = session.execute(
+        select(ProductChange.seq, ProductChange.sku, ProductChange.op, ProductChange.changed_at)
+        .where(ProductChange.seq > since)
+        .order_by(ProductChange.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1].seq if rows else since
+    entries = [{"seq": seq, "sku": sku, "op": op, "changed_at": at} for seq, sku, op, at in rows]
+    return entries, next_cursor, has_more
+
+
+def feed_position(session):
+    """(pruned_through, head): the oldest cursor still served and the newest seq."""
+    state = session.get(ChangeFeedState, 1)
+    pruned_through = state.pruned_through if state else 0
+    head = session.execute(select(func.max(ProductChange.seq))).scalar()
+    return pruned_through, max(head or 0, pruned_through)
+
+
+def compact_changes(session):
+    """Keep only the newest entry per SKU among entries older than the compaction age."""
+    cutoff = datetime.utcnow() - timedelta(hours=CHANGE_FEED_COMPACT_AFTER_HOURS)
+    removed = 0
+    while True:
+        result = session.execute(
+            text(
+                "DELETE FROM product_changes WHERE seq IN ("
+                " SELECT c.seq FROM product_changes c"
+                " WHERE c.changed_at < :cutoff AND c.sku IS NOT NULL"
+                " AND EXISTS (SELECT 1 FROM product_changes n WHERE n.sku = c.sku AND n.seq > c.seq)"
+                " LIMIT :batch)"
+            ),
+            {"cutoff": cutoff, "batch": PRUNE_BATCH_SIZE},
+        )
+        session.commit()
+        removed += result.rowcount
+        if result.rowcount < PRUNE_BATCH_SIZE:
+            return removed
+
+
+def prune_changes(session):
+    """Drop entries past retention and advance the pruned_through watermark."""
+    cutoff = datetime.utcnow() - timedelta(days=CHANGE_FEED_RETENTION_DAYS)
+    watermark = session.execute(
+        select(func.max(ProductChange.seq)).where(ProductChange.changed_at < cutoff)
+    ).scalar()
+    if watermark is None:
+        return 0
+
+    state = session.get(ChangeFeedState, 1)
+    if state is None:
+        state = ChangeFeedState(id=1, pruned_through=0)
+        session.add(state)
+    state.pruned_through = max(state.pruned_through or 0, watermark)
+    session.commit()
+
+    removed = 0
+    while True:
+        result = session.execute(
+            text(
+                "DELETE FROM product_changes WHERE seq IN ("
+                " SELECT seq FROM product_changes WHERE seq <= :watermark LIMIT :batch)"
+            ),
+            {"watermark": watermark, "batch": PRUNE_BATCH_SIZE},
+        )
+        session.commit()
+        removed += result.rowcount
+        if result.rowcount < PRUNE_BATCH_SIZE:
+            return removed
@@ -0,0 +1,194 @@
+# utils/csv_mapping.py
+"""Resolve a CSV header (optionally through a MappingProfile) into a
+positional row decoder.
+
+The decoder is compiled once per file: field positions are resolved up
+front and rows from csv.reader are read with a single itemgetter call,
+so the importer never builds a dict per row.
+"""
+import csv
+import json
+import math
+from operator import itemgetter
+
+from models.mapping_profile import MappingProfile
+from utils.storage import read_head
+
+IMPORT_FIELDS = ("sku", "name", "description", "price", "active")
+REQUIRED_FIELDS = ("sku", "name", "price")
+# mode=partial writes only the columns the file has
+UPDATABLE_FIELDS = ("name", "description", "price", "active")
+PARTIAL_REQUIRED_FIELDS = ("sku",)
+DEFAULT_TRUE_VALUES = ("true", "1", "yes", "y", "active")
+DEFAULT_ENCODING = "utf-8-sig"
+SNIFF_BYTES = 64 * 1024
+SNIFF_DELIMITERS = ",;\t|"
+# products.price is numeric(12, 2); anything larger fails the whole batch INSERT
+MAX_PRICE = 10 ** 10
+
+
+def normalize_header(name):
+    return (name or "").strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class CsvMapping:
+    """Plain settings object built from a MappingProfile or the defaults."""
+
+    def __init__(self, columns=None, delimiter=None, encoding=None, true_values=None,
+                 decimal_separator=".", thousands_separator=None):
+        self.columns = columns or {}
+        self.delimiter = delimiter
+        self.encoding = encoding or DEFAULT_ENCODING
+        self.true_values = frozenset(v.strip().lower() for v in (true_values or DEFAULT_TRUE_VALUES))
+        self.decimal_separator = decimal_separator or "."
+        self.thousands_separator = thousands_separator
+
+    @classmethod
+    def from_profile(cls, profile):
+        if profile is None:
+            return cls()
+        return cls(
+            columns=json.loads(profile.columns) if profile.columns else {},
+            delimiter=profile.delimiter,
+            encoding=profile.encoding,
+            true_values=json.loads(profile.true_values) if profile.true_values else None,
+            decimal_separator=profile.decimal_separator,
+            thousands_separator=profile.thousands_separator,
+        )
+
+
+def mapping_for_job(session, job):
+    profile = session.get(MappingProfile, job.mapping_profile_id) if job.mapping_profile_id else None
+    return CsvMapping.from_profile(profile)
+
+
+def sniff_delimiter(path, encoding):
+    sample = read_head(path, SNIFF_BYTES, encoding)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def resolve_delimiter(path, mapping):
+    return mapping.delimiter or sniff_delimiter(path, mapping.encoding)
+
+
+def resolve_positions(header, mapping):
+    """field -> column index for every IMPORT_FIELD present in the header."""
+    index = {}
+    for i, name in enumerate(header):
+        index.setdefault(normalize_header(name), i)
+
+    positions = {}
+    for field in IMPORT_FIELDS:
+        source = mapping.columns.get(field, field)
+        pos = index.get(normalize_header(source))
+        if pos is not None:
+            positions[field] = pos
+    return positions
+
+
+def missing_fields(positions, required=REQUIRED_FIELDS):
+    return [f for f in required if f not in positions]
+
+
+def required_fields(mode):
+    return PARTIAL_REQUIRED_FIELDS if mode == "partial" else REQUIRED_FIELDS
+
+
+def skip_blank_rows(reader):
+    """Drop empty and all-blank records, which csv.DictReader used to skip."""
+    return (row for row in reader if any(field.strip() for field in row))
+
+
+class RowDecoder:
+    """Compiled extractor for one file's layout."""
+
+    def __init__(self, header, mapping):
+        self.positions = resolve_positions(header, mapping)
+        self.width = len(header)
+        # Absent fields read the empty cell appended to every row
+        pad = self.width
+        self._getter = itemgetter(*(self.positions.get(f, pad) for f in IMPORT_FIELDS))
+        self.has_description = "description" in self.positions
+        self.has_active = "active" in self.positions
+        self.partial_fields = tuple(f for f in UPDATABLE_FIELDS if f in self.positions)
+        self._partial_name = "name" in self.positions
+        self._partial_price = "price" in self.positions
+
+        self._true_values = mapping.true_values
+        self._decimal = mapping.decimal_separator
+        self._thousands = mapping.thousands_separator
+
+    def extract(self, row):
+        """Return (sku, name, description, raw_price, raw_active) as strings."""
+        if len(row) != self.width:
+            row = (row + [""] * self.width)[:self.width]
+        row.append("")
+        return self._getter(row)
+
+    def decode(self, row):
+        """Apply the import's row rules.
+
+        Returns (sku, name, description, price, active, problem); problem is
+        None for a valid row, otherwise the error reported for it. sku is
+        filled in for rejected rows too.
+        """
+        raw_sku, raw_name, raw_description, raw_price, raw_active = self.extract(row)
+        sku = raw_sku.strip().lower()
+        name = raw_name.strip()
+        if not sku or not name:
+            return sku, name, None, None, None, "Missing SKU or name"
+        try:
+            price = self.parse_price(raw_price)
+        except ValueError:
+            return sku, name, None, None, None, "Invalid price"
+        description = raw_description if self.has_description else None
+        return sku, name, description, price, self.parse_active(raw_active), None
+
+    def decode_partial(self, row):
+        """Row rules for mode=partial.
+
+        Returns (sku, values, problem); values line up with partial_fields.
+        """
+        raw_sku, raw_name, raw_description, raw_price, raw_active = self.extract(row)
+        sku = raw_sku.strip().lower()
+        if not sku:
+            return sku, None, "Missing SKU"
+        values = []
+        if self._partial_name:
+            name = raw_name.strip()
+            if not name:
+                return sku, None, "Missing name"
+            values.append(name)
+        if self.has_description:
+            values.append(raw_description)
+        if self._partial_price:
+            try:
+                values.append(self.parse_price(raw_price))
+            except ValueError:
+                return sku, None, "Invalid price"
+        if self.has_active:
+            values.append(self.parse_active(raw_active))
+        return sku, values, None
+
+    def parse_price(self, raw):
+        """None for blank, float otherwise; ValueError on bad, negative or out-of-range values."""
+        raw = raw.strip()
+        if not raw:
+            return None
+        if self._thousands:
+            raw = raw.replace(self._thousands, "")
+        if self._decimal != ".":
+            raw = raw.replace(self._decimal, ".")
+        price = float(raw)
+        if not math.isfinite(price) or price < 0 or round(price, 2) >= MAX_PRICE:
+            raise ValueError
+        return price
+
+    def parse_active(self, raw):
+        if not self.has_active:
+            return True
+        return raw.strip().lower() in self._true_values
+
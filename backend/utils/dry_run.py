@@ -0,0 +1,315 @@
+# utils/dry_run.py
+"""Parallel, read-only validation of an upload (mode=dry_run).
+
+The file is cut into byte ranges that each start on a record boundary and
+every range is validated in its own process with RowDecoder.decode, the
+same rules a real import applies. Nothing is written; each process checks
+its valid SKUs against products to predict created vs updated counts.
+
+The pool is billiard's (Celery's multiprocessing fork): prefork workers are
+daemonic, and the stdlib refuses to start children from a daemonic process.
+"""
+import csv
+import io
+import re
+import time
+
+from billiard.pool import Pool
+from sqlalchemy import select, func, bindparam, any_, String
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from config.config import DRY_RUN_WORKERS, DRY_RUN_MIN_CHUNK_MB
+from models.product import Product
+from utils.csv_mapping import RowDecoder, skip_blank_rows
+from utils.session_manager import get_read_session, safe_close
+from utils.storage import get_storage, open_text
+
+SCAN_BLOCK_SIZE = 1024 * 1024
+BOUNDARY_WINDOW = 256 * 1024
+SKU_CHUNK_SIZE = 20000
+# Ranges per worker, so progress and cancellation are not all-or-nothing
+RANGES_PER_WORKER = 4
+POLL_SECONDS = 1.0
+
+# Quote states of the scanner. A `"` only opens a quoted field at the start
+# of a field; anywhere else in an unquoted field it is a literal character
+# (12" Pizza Pan), exactly as csv.reader reads it.
+OUTSIDE, QUOTED, QUOTE_SEEN = range(3)
+
+
+def _splittable(encoding):
+    """Byte offsets can be cut at b"\\n" only for ASCII-compatible encodings."""
+    sample = 'a\n"'.encode(encoding)  # utf-8-sig prepends a BOM, utf-16/32 pad with NULs
+    return sample.endswith(b'a\n"') and b"\x00" not in sample
+
+
+class _QuoteScanner:
+    """Tracks whether a byte stream ends inside a quoted field, block by block."""
+
+    def __init__(self, delimiter, in_quotes=False):
+        delim = re.escape(delimiter.encode())
+        # An opening quote: right after a delimiter or newline
+        self._opener = re.compile(rb'(?<=[' + delim + rb'\n])"')
+        self._opener_or_newline = re.compile(rb'\n|(?<=[' + delim + rb'\n])"')
+        self._ends = (ord(delimiter), 10)
+        self.state = QUOTED if in_quotes else OUTSIDE
+        self.field_start = True  # the previous byte ended a field
+
+    @property
+    def in_quotes(self):
+        return self.state != OUTSIDE
+
+    def feed(self, block, stop_at_record_end=False):
+        """Advance over block. With stop_at_record_end, return the offset just
+        past the first newline that ends a record, or None if there is none."""
+        i, n = 0, len(block)
+        while i < n:
+            if self.state == OUTSIDE:
+                if self.field_start and block[i] == 34:  # '"'
+                    self.state = QUOTED
+                    i += 1
+                    continue
+                pattern = self._opener_or_newline if stop_at_record_end else self._opener
+                m = pattern.search(block, i)
+                if m is None:
+                    self.field_start = block[n - 1] in self._ends
+                    return None
+                if m.group() == b"\n":
+                    self.field_start = True
+                    return m.end()
+                self.state = QUOTED
+                i = m.end()
+            elif self.state == QUOTED:
+                j = block.find(b'"', i)
+                if j < 0:
+                    return None
+                self.state = QUOTE_SEEN
+                i = j + 1
+            else:
+                # A quote inside a quoted field: "" is an escaped quote,
+                # anything else closes the field
+                c = block[i]
+                i += 1
+                if c == 34:
+                    self.state = QUOTED
+                    continue
+                self.state = OUTSIDE
+                self.field_start = c in self._ends
+                if c == 10 and stop_at_record_end:
+                    return i
+        return None
+
+
+def _scan_range(uri, start, end, delimiter):
+    """Whether [start, end) ends inside a quoted field, for either entry state.
+
+    `start` is just past a newline, where the parser is either at a record
+    start or inside a quoted field, so the two answers fully describe the
+    range. Returns (entered at a record start, entered inside quotes).
+    """
+    scanners = (_QuoteScanner(delimiter, False), _QuoteScanner(delimiter, True))
+    with get_storage(uri).open_range(uri, start, end) as f:
+        while True:
+            block = f.read(SCAN_BLOCK_SIZE)
+            if not block:
+                return tuple(s.in_quotes for s in scanners)
+            for scanner in scanners:
+                scanner.feed(block)
+
+
+def _line_start(storage, uri, offset, size):
+    """Offset just past the first newline at/after `offset`, quoted or not."""
+    pos = offset
+    while pos < size:
+        window = storage.read_range(uri, pos, min(pos + BOUNDARY_WINDOW, size))
+        if not window:
+            break
+        i = window.find(b"\n")
+        if i >= 0:
+            return pos + i + 1
+        pos += len(window)
+    return size
+
+
+def _record_start(storage, uri, offset, size, in_quotes, delimiter=","):
+    """Offset just past the first newline at/after `offset` that ends a record.
+
+    `offset` must start a field, or lie inside a quoted field when in_quotes.
+    """
+    scanner = _QuoteScanner(delimiter, in_quotes)
+    pos = offset
+    while pos < size:
+        window = storage.read_range(uri, pos, min(pos + BOUNDARY_WINDOW, size))
+        if not window:
+            break
+        end = scanner.feed(window, stop_at_record_end=True)
+        if end is not None:
+            return pos + end
+        pos += len(window)
+    return size
+
+
+def _range_count(size, encoding, workers, delimiter=","):
+    # The scanner works on bytes, so the delimiter must be a single ASCII byte
+    if workers < 2 or not _splittable(encoding) or not (delimiter.isascii() and len(delimiter) == 1):
+        return 1
+    min_chunk = max(int(DRY_RUN_MIN_CHUNK_MB * 1024 * 1024), 1)
+    return max(min(workers * RANGES_PER_WORKER, size // min_chunk), 1)
+
+
+def plan_ranges(uri, size, count, pool, delimiter=","):
+    """`count` [(start, end)] byte ranges covering the file, cut between records.
+
+    Nominal cuts are first moved just past a newline. There the parser is
+    either at a record start or inside a quoted field, so every range is
+    scanned in parallel for both cases and the answers are chained in file
+    order to learn which case holds at each cut. A cut inside a quoted
+    field moves on to the end of that record.
+    """
+    storage = get_storage(uri)
+    step = size // count
+    cuts = [0]
+    for i in range(1, count):
+        cuts.append(max(_line_start(storage, uri, i * step, size), cuts[-1]))
+    cuts.append(size)
+    exits = pool.starmap(_scan_range, zip([uri] * count, cuts[:-1], cuts[1:], [delimiter] * count))
+
+    bounds = [0]
+    in_quotes = False
+    for i in range(1, count):
+        in_quotes = exits[i - 1][1 if in_quotes else 0]
+        start = _record_start(storage, uri, cuts[i], size, True, delimiter) if in_quotes else cuts[i]
+        if start > bounds[-1]:
+            bounds.append(start)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _existing_skus(skus):
+    """The subset of skus already in products (read replica)."""
+    session = get_read_session()
+    try:
+        key = func.lower(Product.sku)
+        found = set()
+        skus = list(skus)
+        for i in range(0, len(skus), SKU_CHUNK_SIZE):
+            chunk = skus[i:i + SKU_CHUNK_SIZE]
+            found.update(
+                session.execute(
+                    select(key).where(key == any_(bindparam("skus", chunk, type_=ARRAY(String))))
+                ).scalars()
+            )
+        return found
+    finally:
+        safe_close(session)
+
+
+def validate_range(uri, start, end, header, mapping, delimiter, skip_header):
+    """Validate the records in [start, end).
+
+    Returns (rows, errors, new_skus, existing_skus); row numbers in errors
+    are relative to the range.
+    """
+    decoder = RowDecoder(header, mapping)
+    errors = []
+    valid = set()
+    rows = 0
+    raw = get_storage(uri).open_range(uri, start, end)
+    with io.TextIOWrapper(raw, encoding=mapping.encoding, newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        if skip_header:
+            next(reader, None)
+        for rows, row in enumerate(skip_blank_rows(reader), start=1):
+            sku, _, _, _, _, problem = decoder.decode(row)
+            if problem:
+                errors.append((rows, problem))
+            else:
+                valid.add(sku)
+
+    existing = _existing_skus(valid) if valid else set()
+    return rows, errors, valid - existing, existing
+
+
+class DryRunResult:
+    def __init__(self):
+        self.rows = 0
+        self.errors = []  # "Row N: problem", in file order
+        self.errors_by_reason = {}
+        self.new_skus = set()
+        self.existing_skus = set()
+
+    @property
+    def predicted_created(self):
+        return len(self.new_skus)
+
+    @property
+    def predicted_updated(self):
+        return len(self.existing_skus)
+
+    def add(self, rows, errors, new_skus, existing_skus):
+        offset = self.rows
+        for row, problem in errors:
+            self.errors.append(f"Row {offset + row}: {problem}")
+            self.errors_by_reason[problem] = self.errors_by_reason.get(problem, 0) + 1
+        self.rows += rows
+        self.new_skus |= new_skus
+        self.existing_skus |= existing_skus
+
+    def report(self):
+        return {
+            "rows": self.rows,
+            "valid_rows": self.rows - len(self.errors),
+            "error_rows": len(self.errors),
+            "predicted_created": self.predicted_created,
+            "predicted_updated": self.predicted_updated,
+            "errors_by_reason": self.errors_by_reason,
+            "errors": self.errors,
+        }
+
+
+def run_dry_run(uri, mapping, delimiter, on_progress=None, is_cancelled=None):
+    """Validate the whole upload; returns a DryRunResult, or None if cancelled.
+
+    on_progress(rows_done) is called as ranges finish; is_cancelled() is
+    polled about once a second.
+    """
+    with open_text(uri, mapping.encoding) as f:
+        header = next(csv.reader(f, delimiter=delimiter), [])
+
+    size = get_storage(uri).size(uri)
+    count = _range_count(size, mapping.encoding, DRY_RUN_WORKERS, delimiter)
+    result = DryRunResult()
+
+    if count == 1:
+        result.add(*validate_range(uri, 0, size, header, mapping, delimiter, True))
+        return result
+
+    pool = Pool(processes=min(DRY_RUN_WORKERS, count))
+    try:
+        ranges = plan_ranges(uri, size, count, pool, delimiter)
+        pending = [
+            pool.apply_async(validate_range, (uri, start, end, header, mapping, delimiter, i == 0))
+            for i, (start, end) in enumerate(ranges)
+        ]
+        # Results are merged in range order so row numbers stay absolute
+        merged = 0
+        last_poll = time.monotonic()
+        while merged < len(pending):
+            pending[merged].wait(POLL_SECONDS)
+            progressed = False
+            while merged < len(pending) and pending[merged].ready():
+                result.add(*pending[merged].get())
+                merged += 1
+                progressed = True
+            if progressed and on_progress:
+                on_progress(result.rows)
+            if is_cancelled and time.monotonic() - last_poll >= POLL_SECONDS:
+                last_poll = time.monotonic()
+                if is_cancelled():
+                    return None
+    finally:
+        # Also stops ranges still running after a cancel or an error
+        pool.terminate()
+        pool.join()
+    return result
@@ -0,0 +1,79 @@
+# utils/fast_json.py
+"""JSON responses for the read path: orjson plus negotiated compression.
+
+orjson serializes dicts, datetimes and floats natively; the stdlib json
+module is the fallback when it is not installed. Bodies of at least
+RESPONSE_COMPRESSION_MIN_BYTES are brotli- (if the `brotli` package is
+installed) or gzip-compressed when the client accepts it.
+"""
+import gzip
+import json
+from datetime import date
+
+from flask import Response, request
+
+from config.config import RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_MIN_BYTES
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # optional; enables Content-Encoding: br
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def accepted_encoding(header):
+    """Best Content-Encoding we can produce for an Accept-Encoding header, or None."""
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def json_response(payload, status=200):
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype="application/json")
+    if RESPONSE_COMPRESSION and len(body) >= RESPONSE_COMPRESSION_MIN_BYTES:
+        response.vary.add("Accept-Encoding")
+        encoding = accepted_encoding(request.headers.get("Accept-Encoding"))
+        if encoding:
+            response.set_data(compress(body, encoding))
+            response.headers["Content-Encoding"] = encoding
+    return response
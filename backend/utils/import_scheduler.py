@@ -0,0 +1,142 @@
+# utils/import_scheduler.py
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, func, text
+
+from config.config import (
+    IMPORT_MAX_CONCURRENT,
+    IMPORT_MAX_PER_SOURCE,
+    IMPORT_SMALL_FILE_MB,
+    IMPORT_SMALL_RESERVED_SLOTS,
+    IMPORT_STALE_MINUTES,
+)
+from models.import_job import ImportJob
+from utils.session_manager import get_session, safe_close
+
+logger = logging.getLogger(__name__)
+
+RUNNING_STATUSES = ("scheduled", "parsing", "processing")
+IMPORT_QUEUE = "imports"
+SMALL_IMPORT_QUEUE = "imports_small"
+
+# Arbitrary constant; only one dispatcher may hand out slots at a time
+DISPATCH_LOCK_KEY = 7_301_028
+
+
+def _source_key(source):
+    # Imports without a source (e.g. dashboard uploads) share one bucket,
+    # so they are capped and serialized like any single feed
+    return source or ""
+
+
+def _is_small(job):
+    return job.file_size_mb <= IMPORT_SMALL_FILE_MB
+
+
+def _waiting_order():
+    # Smallest files first, then oldest
+    return (ImportJob.file_size_mb.asc(), ImportJob.created_at.asc())
+
+
+def dispatch_queued_imports():
+    """Send as many queued imports to Celery as the concurrency caps allow.
+
+    Safe to call from anywhere (upload, retry, end of an import, beat).
+    Returns the list of dispatched job ids.
+    """
+    # Sent by name so the web process never imports the task module
+    from celery_app import celery
+
+    session = get_session()
+    dispatched = []
+    try:
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": DISPATCH_LOCK_KEY})
+
+        stale_before = datetime.utcnow() - timedelta(minutes=IMPORT_STALE_MINUTES)
+
+        # Dispatched but never picked up by a worker (e.g. broker lost it)
+        session.query(ImportJob).filter(
+            ImportJob.status == "scheduled", ImportJob.updated_at < stale_before
+        ).update({"status": "queued"}, synchronize_session=False)
+
+        running = (
+            session.query(ImportJob.source, ImportJob.file_size_mb)
+            .filter(ImportJob.status.in_(RUNNING_STATUSES), ImportJob.updated_at >= stale_before)
+            .all()
+        )
+        per_source = Counter(_source_key(src) for src, _ in running)
+        running_large = sum(1 for _, size in running if size > IMPORT_SMALL_FILE_MB)
+        running_total = len(running)
+
+        waiting = (
+            session.query(ImportJob)
+            .filter(ImportJob.status == "queued")
+            .order_by(*_waiting_order())
+            .all()
+        )
+
+        for job in waiting:
+            small = _is_small(job)
+            limit = IMPORT_MAX_CONCURRENT + (IMPORT_SMALL_RESERVED_SLOTS if small else 0)
+            # Large jobs can never take the reserved small-job slots
+            if running_total >= limit or (not small and running_large >= IMPORT_MAX_CONCURRENT):
+                continue
+            if per_source[_source_key(job.source)] >= IMPORT_MAX_PER_SOURCE:
+                continue
+
+            job.status = "scheduled"
+            running_total += 1
+            if not small:
+                running_large += 1
+            per_source[_source_key(job.source)] += 1
+            dispatched.append((job.id, SMALL_IMPORT_QUEUE if small else IMPORT_QUEUE))
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        safe_close(session)
+
+    for job_id, queue in dispatched:
+        try:
+            celery.send_task("tasks.import_tasks.process_csv_import", args=[job_id], queue=queue)
+            logger.info("Dispatched import job %s to %s", job_id, queue)
+        except Exception:
+            logger.exception("Dispatch failed for import job %s, requeueing", job_id)
+            _requeue(job_id)
+
+    return [job_id for job_id, _ in dispatched]
+
+
+def _requeue(job_id):
+    session = get_session()
+    try:
+        job = session.get(ImportJob, job_id)
+        if job and job.status == "scheduled":
+            job.status = "queued"
+            session.commit()
+    finally:
+        safe_close(session)
+
+
+def queue_position(session, job):
+    """1-based position of a queued job in the scheduler's waiting order."""
+    if job.status != "queued":
+        return None
+    ahead = (
+        session.query(func.count(ImportJob.id))
+        .filter(
+            ImportJob.status == "queued",
+            or_(
+                ImportJob.file_size_mb < job.file_size_mb,
+                and_(
+                    ImportJob.file_size_mb == job.file_size_mb,
+                    ImportJob.created_at < job.created_at,
+                ),
+            ),
+        )
+        .scalar()
+    )
+    return (ahead or 0) + 1
@@ -0,0 +1,173 @@
+# utils/import_sync.py
+import hashlib
+from sqlalchemy import select, update, delete, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models.import_job import ImportJob
+from models.import_job_row import ImportJobRow
+from models.product import Product
+from utils.import_scheduler import RUNNING_STATUSES
+from utils.product_cache import invalidate_skus
+from utils.change_feed import record_changes
+
+IMPORT_MODES = ("upsert", "full_sync", "delta", "partial", "dry_run")
+MISSING_ACTIONS = ("deactivate", "delete")
+
+SYNC_RANGE_SIZE = 50000
+SKU_CHUNK_SIZE = 5000
+
+
+def row_hash(name, description, price, active):
+    """Stable signed 64-bit hash of the fields an import writes."""
+    raw = f"{name}\x1f{description or ''}\x1f{'' if price is None else price}\x1f{int(active)}"
+    return int.from_bytes(hashlib.blake2b(raw.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def record_rows(session, job_id, hashes):
+    """Stage sku -> hash for this job (committed together with the batch)."""
+    if not hashes:
+        return
+    stmt = pg_insert(ImportJobRow).values(
+        [{"job_id": job_id, "sku": sku, "row_hash": h} for sku, h in hashes.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ImportJobRow.job_id, ImportJobRow.sku],
+        set_={"row_hash": stmt.excluded.row_hash},
+    )
+    session.execute(stmt)
+    hashes.clear()
+
+
+def previous_snapshot_job_id(session, job):
+    """Latest finished full_sync/delta job from the same source, if any."""
+    if not job.source:
+        return None
+    return (
+        session.query(ImportJob.id)
+        .filter(
+            ImportJob.source == job.source,
+            ImportJob.id != job.id,
+            ImportJob.mode.in_(("full_sync", "delta")),
+            ImportJob.status.in_(("completed", "completed_with_errors")),
+        )
+        .order_by(ImportJob.updated_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def unchanged_skus(session, snapshot_job_id, hashes):
+    """SKUs of a batch whose hash matches the snapshot (one join on the primary key)."""
+    if not snapshot_job_id or not hashes:
+        return set()
+    skus = list(hashes)
+    sql = text(
+        "SELECT r.sku FROM import_job_rows r "
+        "JOIN unnest(CAST(:skus AS varchar[]), CAST(:hashes AS bigint[])) AS b(sku, row_hash) "
+        "ON r.sku = b.sku AND r.row_hash = b.row_hash "
+        "WHERE r.job_id = :snapshot"
+    )
+    return set(
+        session.execute(
+            sql, {"skus": skus, "hashes": [hashes[sku] for sku in skus], "snapshot": snapshot_job_id}
+        ).scalars()
+    )
+
+
+def remove_absent_products(session, job_id, missing_action):
+    """Anti-join products against the job's staged SKUs, one id range at a time."""
+    lo, hi = session.query(func.min(Product.id), func.max(Product.id)).one()
+    session.commit()
+    if lo is None:
+        return 0
+
+    if missing_action == "delete":
+        sql = text(
+            "DELETE FROM products p "
+            "WHERE p.id >= :lo AND p.id < :hi "
+            "AND NOT EXISTS (SELECT 1 FROM import_job_rows r WHERE r.job_id = :job_id AND r.sku = lower(p.sku)) "
+            "RETURNING p.sku"
+        )
+    else:
+        sql = text(
+            "UPDATE products p SET active = false, updated_at = now() "
+            "WHERE p.id >= :lo AND p.id < :hi AND p.active "
+            "AND NOT EXISTS (SELECT 1 FROM import_job_rows r WHERE r.job_id = :job_id AND r.sku = lower(p.sku)) "
+            "RETURNING p.sku"
+        )
+
+    removed = 0
+    for start in range(lo, hi + 1, SYNC_RANGE_SIZE):
+        skus = session.execute(sql, {"lo": start, "hi": start + SYNC_RANGE_SIZE, "job_id": job_id}).scalars().all()
+        record_changes(session, skus, op="delete" if missing_action == "delete" else "upsert")
+        session.commit()
+        invalidate_skus(skus)
+        removed += len(skus)
+    return removed
+
+
+def remove_vanished_skus(session, job_id, snapshot_job_id, missing_action):
+    """Remove SKUs present in the snapshot but not in this job, a page of SKUs at a time."""
+    sql = text(
+        "SELECT s.sku FROM import_job_rows s "
+        "WHERE s.job_id = :snapshot AND s.sku > :after "
+        "AND NOT EXISTS (SELECT 1 FROM import_job_rows r WHERE r.job_id = :job_id AND r.sku = s.sku) "
+        "ORDER BY s.sku LIMIT :limit"
+    )
+    removed = 0
+    after = ""
+    while True:
+        skus = session.execute(
+            sql, {"snapshot": snapshot_job_id, "job_id": job_id, "after": after, "limit": SKU_CHUNK_SIZE}
+        ).scalars().all()
+        if not skus:
+            return removed
+        removed += remove_skus(session, skus, missing_action)
+        after = skus[-1]
+
+
+def remove_skus(session, skus, missing_action):
+    """Deactivate/delete the given lowercase SKUs via ix_products_sku_lower."""
+    skus = list(skus)
+    removed = 0
+    for i in range(0, len(skus), SKU_CHUNK_SIZE):
+        chunk = skus[i:i + SKU_CHUNK_SIZE]
+        if missing_action == "delete":
+            stmt = delete(Product).where(func.lower(Product.sku).in_(chunk))
+        else:
+            stmt = (
+                update(Product)
+                .where(func.lower(Product.sku).in_(chunk), Product.active.is_(True))
+                .values(active=False, updated_at=func.now())
+            )
+        changed = session.execute(
+            stmt.returning(Product.sku), execution_options={"synchronize_session": False}
+        ).scalars().all()
+        record_changes(session, changed, op="delete" if missing_action == "delete" else "upsert")
+        session.commit()
+        invalidate_skus(changed)
+        removed += len(changed)
+    return removed
+
+
+def finalize_snapshot(session, job):
+    """Keep this job's rows as the source snapshot; drop older finished ones.
+
+    Rows of running jobs are never touched, and nothing is dropped while
+    another import of the source runs, since it may be diffing against
+    the previous snapshot.
+    """
+    if job.source:
+        others = select(ImportJob.id).where(ImportJob.source == job.source, ImportJob.id != job.id)
+        busy = session.query(others.where(ImportJob.status.in_(RUNNING_STATUSES)).exists()).scalar()
+        if not busy:
+            stale = others.where(ImportJob.status.notin_(RUNNING_STATUSES + ("queued",)))
+            session.query(ImportJobRow).filter(ImportJobRow.job_id.in_(stale)).delete(synchronize_session=False)
+    else:
+        discard_rows(session, job.id)
+    session.commit()
+
+
+def discard_rows(session, job_id):
+    session.query(ImportJobRow).filter(ImportJobRow.job_id == job_id).delete(synchronize_session=False)
+    session.commit()
@@ -0,0 +1,313 @@
+# utils/product_cache.py
+"""Two-tier read-through cache for single-SKU lookups.
+
+Tier 1 is an in-process LRU with a short TTL, tier 2 is Redis shared by all
+processes. Keys are the normalized (stripped, lowercase) SKU. Writers call
+put_product / invalidate_skus / clear_product_cache; invalidations are also
+published so every web process drops its local copy right away.
+
+Fills are guarded so a reader that loaded a row before a write cannot put
+the old value back afterwards: the local tier keeps a generation bumped by
+every invalidation, and Redis keeps a version per SKU (plus one for full
+clears) that a fill must still match when it is written.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from config.config import (
+    CACHE_REDIS_URL,
+    PRODUCT_CACHE_SIZE,
+    PRODUCT_CACHE_LOCAL_TTL,
+    PRODUCT_CACHE_REDIS_TTL,
+    PRODUCT_CACHE_NEGATIVE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "product:sku:"
+VERSION_PREFIX = "product:ver:"
+GENERATION_KEY = "product:generation"
+VERSION_TTL = 24 * 3600
+INVALIDATE_CHANNEL = "product-cache:invalidate"
+CLEAR_ALL = "*"
+REDIS_RETRY_SECONDS = 30
+INVALIDATE_CHUNK = 1000
+
+# KEYS: value, sku version, generation; ARGV: expected version, expected generation, value, ttl
+FILL_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] and (redis.call('GET', KEYS[3]) or '0') == ARGV[2] then
+    return redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4])
+end
+return 0
+"""
+
+
+def normalize_sku(sku):
+    return (sku or "").strip().lower()
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry expiry. Values may be None (negative hit)."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.generation = 0  # bumped by every delete/clear
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return (found, value)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value, ttl=None, generation=None):
+        """Store value; with `generation`, only if nothing was invalidated since."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_many(self, keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_local = LRUCache(PRODUCT_CACHE_SIZE, PRODUCT_CACHE_LOCAL_TTL)
+_redis = None
+_redis_down_until = 0.0
+_listener_started = False
+_state_lock = threading.Lock()
+_counters = {"redis_hits": 0, "redis_misses": 0, "redis_errors": 0, "db_loads": 0, "invalidations": 0}
+
+
+def _count(name, n=1):
+    with _state_lock:
+        _counters[name] += n
+
+
+def _redis_client():
+    """Shared Redis client, or None when Redis is unset/unreachable."""
+    global _redis, _redis_down_until
+    if not CACHE_REDIS_URL or time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        with _state_lock:
+            if _redis is None:
+                import redis
+                _redis = redis.Redis.from_url(CACHE_REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+    return _redis
+
+
+def _redis_failed(e):
+    global _redis_down_until
+    _count("redis_errors")
+    _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+    logger.warning("Product cache Redis unavailable, using local tier only: %s", e)
+
+
+def _start_listener():
+    """Subscribe to invalidations so this process's LRU never outlives a write."""
+    global _listener_started
+    with _state_lock:
+        if _listener_started or not CACHE_REDIS_URL:
+            return
+        _listener_started = True
+
+    def listen():
+        import redis
+        while True:
+            try:
+                client = redis.Redis.from_url(CACHE_REDIS_URL)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATE_CHANNEL)
+                # Anything published while we were disconnected is lost
+                _local.clear()
+                for message in pubsub.listen():
+                    skus = json.loads(message["data"])
+                    if skus == CLEAR_ALL:
+                        _local.clear()
+                    else:
+                        _local.delete_many(skus)
+            except Exception as e:
+                logger.warning("Product cache listener reconnecting: %s", e)
+                time.sleep(REDIS_RETRY_SECONDS)
+
+    threading.Thread(target=listen, name="product-cache-listener", daemon=True).start()
+
+
+# -------------------------------------------------
+# Read path
+# -------------------------------------------------
+def get_product(sku, loader):
+    """Return the product dict for sku (or None), filling both tiers on miss.
+
+    loader(normalized_sku) must return a product dict or None.
+    """
+    _start_listener()
+    key = normalize_sku(sku)
+
+    # Taken before any read so a later invalidation voids this fill
+    generation = _local.generation
+    found, value = _local.get(key)
+    if found:
+        return value
+
+    versions = None
+    client = _redis_client()
+    if client is not None:
+        try:
+            raw, version, clears = client.mget(KEY_PREFIX + key, VERSION_PREFIX + key, GENERATION_KEY)
+            if raw is not None:
+                _count("redis_hits")
+                value = json.loads(raw)
+                _local.set(key, value, None if value is not None else PRODUCT_CACHE_NEGATIVE_TTL, generation)
+                return value
+            _count("redis_misses")
+            versions = (version or b"0").decode(), (clears or b"0").decode()
+        except Exception as e:
+            _redis_failed(e)
+
+    _count("db_loads")
+    value = loader(key)
+    _store(key, value, generation, versions)
+    return value
+
+
+def _store(key, value, generation, versions):
+    """Fill both tiers; dropped wherever an invalidation happened since the read."""
+    negative = value is None
+    ttl = PRODUCT_CACHE_NEGATIVE_TTL if negative else PRODUCT_CACHE_REDIS_TTL
+    _local.set(key, value, PRODUCT_CACHE_NEGATIVE_TTL if negative else None, generation)
+    if versions is None:
+        return  # Redis was unreachable when the fill started
+    client = _redis_client()
+    if client is not None:
+        try:
+            client.eval(
+                FILL_SCRIPT, 3, KEY_PREFIX + key, VERSION_PREFIX + key, GENERATION_KEY,
+                *versions, json.dumps(value), ttl,
+            )
+        except Exception as e:
+            _redis_failed(e)
+
+
+# -------------------------------------------------
+# Write path
+# -------------------------------------------------
+def put_product(product_dict):
+    """Refresh the cache after a create/update.
+
+    Only invalidates: writing the value here could race another writer
+    (bump, bump, set, set) and leave the older row cached. The next read
+    fills through the version check instead.
+    """
+    invalidate_skus([product_dict.get("sku")])
+
+
+def invalidate_skus(skus):
+    keys = list({normalize_sku(s) for s in skus if s})
+    if not keys:
+        return
+    _count("invalidations", len(keys))
+    _local.delete_many(keys)
+
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        for i in range(0, len(keys), INVALIDATE_CHUNK):
+            chunk = keys[i:i + INVALIDATE_CHUNK]
+            pipe = client.pipeline(transaction=False)
+            pipe.unlink(*[KEY_PREFIX + k for k in chunk])
+            for k in chunk:
+                pipe.incr(VERSION_PREFIX + k)
+                pipe.expire(VERSION_PREFIX + k, VERSION_TTL)
+            pipe.publish(INVALIDATE_CHANNEL, json.dumps(chunk))
+            pipe.execute()
+    except Exception as e:
+        _redis_failed(e)
+
+
+def clear_product_cache():
+    """Drop every cached SKU (e.g. after a full wipe)."""
+    _local.clear()
+    client = _redis_client()
+    if client is None:
+        return
+    try:
+        client.incr(GENERATION_KEY)
+        batch = []
+        for key in client.scan_iter(match=KEY_PREFIX + "*", count=INVALIDATE_CHUNK):
+            batch.append(key)
+            if len(batch) >= INVALIDATE_CHUNK:
+                client.unlink(*batch)
+                batch.clear()
+        if batch:
+            client.unlink(*batch)
+        client.publish(INVALIDATE_CHANNEL, json.dumps(CLEAR_ALL))
+    except Exception as e:
+        _redis_failed(e)
+
+
+def cache_stats():
+    local = _local.stats()
+    with _state_lock:
+        counters = dict(_counters)
+    lookups = local["hits"] + local["misses"]
+    served = local["hits"] + counters["redis_hits"]
+    return {
+        "local": local,
+        "redis": {
+            "enabled": bool(CACHE_REDIS_URL),
+            "hits": counters["redis_hits"],
+            "misses": counters["redis_misses"],
+            "errors": counters["redis_errors"],
+        },
+        "db_loads": counters["db_loads"],
+        "invalidations": counters["invalidations"],
+        "hit_ratio": round(served / lookups, 4) if lookups else None,
+        "local_hit_ratio": round(local["hits"] / lookups, 4) if lookups else None,
+    }
@@ -0,0 +1,184 @@
+from datetime import datetime
+from sqlalchemy import or_, func, select, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from models.product import Product
+
+
+def parse_bool(value):
+    return str(value).lower() in ("true", "1", "yes")
+
+
+def product_filter_clauses(active=None, search=None, min_price=None, max_price=None, updated_since=None):
+    """WHERE clauses shared by product listings and bulk operations.
+
+    Raises ValueError for malformed range values.
+    """
+    clauses = []
+
+    if active is not None:
+        clauses.append(Product.active == parse_bool(active))
+
+    search = (search or "").strip().lower()
+    if search:
+        clauses.append(
+            or_(
+                func.lower(Product.sku).contains(search),
+                func.lower(Product.name).contains(search),
+                func.lower(Product.description).contains(search),
+            )
+        )
+
+    if min_price not in (None, ""):
+        clauses.append(Product.price >= float(min_price))
+    if max_price not in (None, ""):
+        clauses.append(Product.price <= float(max_price))
+    if updated_since not in (None, ""):
+        clauses.append(Product.updated_at >= datetime.fromisoformat(str(updated_since)))
+
+    return clauses
+
+
+# ---------- Sorting ----------
+# Each sort key is backed by a (column, id) index in models/product.py; id is
+# the tie-breaker so pages are stable and the index order is used as-is.
+SORT_COLUMNS = {
+    "price": Product.price,
+    "name": Product.name,
+    "updated_at": Product.updated_at,
+    "created_at": Product.id,  # ids are assigned in creation order
+}
+
+
+def product_order_by(sort=None, order=None):
+    """ORDER BY for `sort=price&order=desc` or `sort=-price`; None when unsorted."""
+    order = (order or "").strip().lower()
+    if order and order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    sort = (sort or "").strip()
+    if not sort:
+        return None
+    descending = sort.startswith("-")
+    sort = sort.lstrip("-+")
+    if order:
+        descending = order == "desc"
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+
+    column = SORT_COLUMNS[sort]
+    if column is Product.id:
+        return [Product.id.desc() if descending else Product.id.asc()]
+    if descending:
+        return [column.desc(), Product.id.desc()]
+    return [column.asc(), Product.id.asc()]
+
+
+# ---------- Facets ----------
+PRICE_BUCKETS = (0, 10, 50, 100, 500, 1000, 5000)
+
+
+def product_facets(session, clauses, buckets=PRICE_BUCKETS):
+    """Active/inactive counts and price buckets in a single aggregate query."""
+    edges = list(buckets) + [None]
+    columns = [
+        func.count().filter(Product.active.is_(True)),
+        func.count().filter(Product.active.is_(False)),
+        func.count().filter(Product.price.is_(None)),
+    ]
+    for lo, hi in zip(edges, edges[1:]):
+        cond = Product.price >= lo
+        if hi is not None:
+            cond = cond & (Product.price < hi)
+        columns.append(func.count().filter(cond))
+
+    row = session.execute(select(*columns).select_from(Product).where(*clauses)).one()
+    return {
+        "active": {"true": row[0], "false": row[1]},
+        "price_buckets": [
+            {"min": lo, "max": hi, "count": count}
+            for (lo, hi), count in zip(zip(edges, edges[1:]), row[3:])
+        ],
+        "price_missing": row[2],
+    }
+
+
+# Public product fields, in to_dict() order
+PRODUCT_FIELDS = ("id", "sku", "name", "description", "price", "active", "created_at", "updated_at")
+
+
+def normalize_skus(raw_skus):
+    """Strip/lowercase like the importer, dropping blanks and duplicates (order kept)."""
+    seen = {}
+    for raw in raw_skus:
+        sku = str(raw or "").strip().lower()
+        if sku:
+            seen.setdefault(sku, None)
+    return list(seen)
+
+
+def parse_fields(raw):
+    """`fields=sku,price` -> those fields in PRODUCT_FIELDS order; all when blank."""
+    requested = {f.strip() for f in (raw or "").split(",") if f.strip()}
+    if not requested:
+        return PRODUCT_FIELDS
+    unknown = requested.difference(PRODUCT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(f for f in PRODUCT_FIELDS if f in requested)
+
+
+def product_columns(fields):
+    return [getattr(Product, f) for f in fields]
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+# Numeric -> float is the only conversion the JSON layer needs; orjson
+# writes naive datetimes exactly like isoformat(). Dates are converted up
+# front only for dicts that go through the stdlib json (e.g. the cache).
+FIELD_ENCODERS = {"price": _float}
+TEXT_FIELD_ENCODERS = {"price": _float, "created_at": _isoformat, "updated_at": _isoformat}
+
+
+def product_row_encoder(fields, dates_as_text=False):
+    """Compile a Row (in `fields` order) -> dict function for one field list."""
+    fields = tuple(fields)
+    encoders = TEXT_FIELD_ENCODERS if dates_as_text else FIELD_ENCODERS
+    converted = [(i, f, encoders[f]) for i, f in enumerate(fields) if f in encoders]
+
+    def encode(row):
+        item = dict(zip(fields, row))
+        for i, field, convert in converted:
+            item[field] = convert(row[i])
+        return item
+
+    return encode
+
+
+def lookup_products(session, skus, fields=PRODUCT_FIELDS, chunk_size=1000):
+    """Resolve normalized SKUs with `lower(sku) = ANY(:skus)` on ix_products_sku_lower.
+
+    Returns (found dicts in request order, missing skus).
+    """
+    columns = product_columns(fields)
+    key = func.lower(Product.sku).label("_key")
+    encode = product_row_encoder(fields)
+
+    by_key = {}
+    for i in range(0, len(skus), chunk_size):
+        chunk = skus[i:i + chunk_size]
+        rows = session.execute(
+            select(key, *columns).where(key == any_(bindparam("skus", chunk, type_=ARRAY(String))))
+        ).all()
+        for row in rows:
+            by_key[row[0]] = encode(row[1:])
+
+    found = [by_key[s] for s in skus if s in by_key]
+    missing = [s for s in skus if s not in by_key]
+    return found, missing
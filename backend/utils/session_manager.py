@@ -1,13 +1,103 @@
+import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from config.config import SQLALCHEMY_DATABASE_URI
+from config.config import (
+    SQLALCHEMY_DATABASE_URI,
+    SQLALCHEMY_REPLICA_URI,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_REPLICA_POOL_SIZE,
+    DB_REPLICA_MAX_OVERFLOW,
+    WORKER_DB_POOL_SIZE,
+    WORKER_DB_MAX_OVERFLOW,
+)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, pool_size=20, max_overflow=10)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engines are built on first use so importing this module never connects
+_engines = {}
+_pool_settings = {
+    "primary": (DB_POOL_SIZE, DB_MAX_OVERFLOW),
+    "replica": (DB_REPLICA_POOL_SIZE, DB_REPLICA_MAX_OVERFLOW),
+}
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _build_engine(url, pool_size, max_overflow):
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+
+def get_engine():
+    if "primary" not in _engines:
+        _engines["primary"] = _build_engine(SQLALCHEMY_DATABASE_URI, *_pool_settings["primary"])
+    return _engines["primary"]
+
+
+def get_read_engine():
+    if not SQLALCHEMY_REPLICA_URI:
+        return get_engine()
+    if "replica" not in _engines:
+        _engines["replica"] = _build_engine(SQLALCHEMY_REPLICA_URI, *_pool_settings["replica"])
+    return _engines["replica"]
+
+
+def dispose_engines(close=True):
+    for eng in list(_engines.values()):
+        eng.dispose(close=close)
+
+
+def _after_fork_in_child():
+    # Connections inherited from the parent belong to the parent; drop them
+    # without closing so the parent's sockets stay intact (gunicorn preload,
+    # Celery prefork).
+    dispose_engines(close=False)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def configure_for_worker():
+    """Switch to the (smaller) worker pool settings.
+
+    Called once per Celery child process.
+    """
+    _pool_settings["primary"] = (WORKER_DB_POOL_SIZE, WORKER_DB_MAX_OVERFLOW)
+    _pool_settings["replica"] = (WORKER_DB_POOL_SIZE, WORKER_DB_MAX_OVERFLOW)
+    dispose_engines(close=False)
+    _engines.clear()
+
+
+def pool_status():
+    """Checked-out/overflow figures for every engine built so far."""
+    status = {}
+    for name, eng in _engines.items():
+        pool = eng.pool
+        pool_size, max_overflow = _pool_settings[name]
+        status[name] = {
+            "pool_size": pool.size(),
+            "max_overflow": max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "saturated": pool.checkedout() >= pool_size + max_overflow,
+        }
+    return status
 
 
 def get_session():
-    return SessionLocal()
+    return SessionLocal(bind=get_engine())
+
+
+def get_read_session(primary=False):
+    if primary:
+        return get_session()
+    return SessionLocal(bind=get_read_engine())
 
 
 def safe_close(session):
@@ -15,4 +105,4 @@ def safe_close(session):
         try:
             session.close()
         except:
-            pass
\ No newline at end of file
+            pass
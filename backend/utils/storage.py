@@ -0,0 +1,199 @@
+# utils/storage.py
+"""Upload storage behind ImportJob.file_path.
+
+A job's file_path is either a plain local path (the historical format) or
+an ``s3://bucket/key`` URI. Workers stream uploads straight from the
+backend; nothing is copied to local disk first.
+"""
+import io
+import os
+import shutil
+
+from config.config import UPLOAD_STORAGE, UPLOAD_FOLDER, S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL
+
+S3_SCHEME = "s3://"
+STREAM_BUFFER_SIZE = 1024 * 1024
+
+
+class LocalStorage:
+    remote = False
+
+    def __init__(self, folder=UPLOAD_FOLDER):
+        self.folder = folder
+
+    def save(self, fileobj, name):
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, name)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(fileobj, out, STREAM_BUFFER_SIZE)
+        return path
+
+    def open_binary(self, uri):
+        return open(uri, "rb")
+
+    def open_range(self, uri, start, end):
+        """Stream of bytes [start, end) of the upload."""
+        f = open(uri, "rb")
+        f.seek(start)
+        return io.BufferedReader(_LimitedRawStream(f, max(end - start, 0)), STREAM_BUFFER_SIZE)
+
+    def read_range(self, uri, start, end):
+        """Bytes [start, end) of the upload."""
+        with open(uri, "rb") as f:
+            f.seek(start)
+            return f.read(max(end - start, 0))
+
+    def size(self, uri):
+        return os.path.getsize(uri)
+
+    def exists(self, uri):
+        return os.path.exists(uri)
+
+    def delete(self, uri):
+        if os.path.exists(uri):
+            os.remove(uri)
+
+
+class _LimitedRawStream(io.RawIOBase):
+    """Reads at most `limit` bytes from a file object, then reports EOF."""
+
+    def __init__(self, f, limit):
+        self._f = f
+        self._remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        data = self._f.read(min(len(buffer), self._remaining))
+        n = len(data)
+        buffer[:n] = data
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+class _S3RawStream(io.RawIOBase):
+    """Adapts a botocore StreamingBody to RawIOBase so it can be buffered and decoded."""
+
+    def __init__(self, body):
+        self._body = body
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._body.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
+
+    def close(self):
+        self._body.close()
+        super().close()
+
+
+class S3Storage:
+    remote = True
+
+    def __init__(self, bucket=S3_BUCKET, prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import boto3  # optional; only needed when UPLOAD_STORAGE=s3
+            except ImportError:
+                raise RuntimeError("UPLOAD_STORAGE=s3 requires boto3: pip install boto3") from None
+            self._client = boto3.client("s3", endpoint_url=self.endpoint_url)
+        return self._client
+
+    @staticmethod
+    def _split(uri):
+        bucket, _, key = uri[len(S3_SCHEME):].partition("/")
+        return bucket, key
+
+    def save(self, fileobj, name):
+        key = f"{self.prefix}{name}"
+        self.client.upload_fileobj(fileobj, self.bucket, key)
+        return f"{S3_SCHEME}{self.bucket}/{key}"
+
+    def open_binary(self, uri):
+        bucket, key = self._split(uri)
+        body = self.client.get_object(Bucket=bucket, Key=key)["Body"]
+        return io.BufferedReader(_S3RawStream(body), STREAM_BUFFER_SIZE)
+
+    def open_range(self, uri, start, end):
+        if end <= start:
+            return io.BytesIO(b"")
+        bucket, key = self._split(uri)
+        body = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}")["Body"]
+        return io.BufferedReader(_S3RawStream(body), STREAM_BUFFER_SIZE)
+
+    def read_range(self, uri, start, end):
+        if end <= start:
+            return b""
+        from botocore.exceptions import ClientError
+
+        bucket, key = self._split(uri)
+        try:
+            res = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                return b""
+            raise
+        return res["Body"].read()
+
+    def size(self, uri):
+        bucket, key = self._split(uri)
+        return self.client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+
+    def exists(self, uri):
+        try:
+            self.size(uri)
+            return True
+        except Exception:
+            return False
+
+    def delete(self, uri):
+        bucket, key = self._split(uri)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+
+_backends = {}
+
+
+def _after_fork_in_child():
+    # A boto3 client's keep-alive connections belong to the parent; children
+    # (the dry-run pool, Celery prefork) build their own client on first use
+    _backends.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_storage(uri=None):
+    """Backend for an existing upload's URI, or the configured one for new uploads."""
+    kind = UPLOAD_STORAGE if uri is None else ("s3" if uri.startswith(S3_SCHEME) else "local")
+    if kind not in _backends:
+        _backends[kind] = S3Storage() if kind == "s3" else LocalStorage()
+    return _backends[kind]
+
+
+def open_text(uri, encoding):
+    """Stream an upload as text; newline="" as the csv module expects."""
+    return io.TextIOWrapper(get_storage(uri).open_binary(uri), encoding=encoding, newline="")
+
+
+def read_head(uri, nbytes, encoding):
+    """First nbytes decoded, dropping a character split at the boundary."""
+    return get_storage(uri).read_range(uri, 0, nbytes).decode(encoding, errors="ignore")
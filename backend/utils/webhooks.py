@@ -1,5 +1,4 @@
 # utils/webhooks.py
-import requests
 import hmac
 import hashlib
 import json
@@ -8,6 +7,8 @@ from models.webhook import Webhook
 from utils.session_manager import get_session, safe_close
 
 def trigger_webhooks(event_type, payload, single_hook=None):
+    import requests  # heavy; only needed once a webhook actually fires
+
     session = get_session()
     try:
         if single_hook:
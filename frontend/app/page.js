@@ -21,6 +21,13 @@ import { Trash2, Edit, Plus, Search, X, Package, TrendingUp, DollarSign } from '
 import Link from 'next/link';
 
 const API_BASE = 'https://fullfill-io.onrender.com/api';
+// Matches READ_YOUR_WRITES_SECONDS on the backend. The read-your-writes
+// cookie is never sent cross-origin, so reads right after a change ask
+// for the primary explicitly instead of hitting a lagging replica.
+const READ_YOUR_WRITES_MS = 5000;
+let lastWriteAt = 0;
+const markWrite = () => { lastWriteAt = Date.now(); };
+const consistentParams = () => (Date.now() - lastWriteAt < READ_YOUR_WRITES_MS ? { consistent: '1' } : {});
 
 export default function ProductsPage() {
   const [products, setProducts] = useState([]);
@@ -46,7 +53,8 @@ export default function ProductsPage() {
       page: page.toString(),
       per_page: '10',
       search,
-      ...(activeFilter !== 'all' && { active: activeFilter })
+      ...(activeFilter !== 'all' && { active: activeFilter }),
+      ...consistentParams()
     });
     try {
       const res = await fetch(`${API_BASE}/products?${params}`);
@@ -63,7 +71,7 @@ export default function ProductsPage() {
 
 const fetchStats = async () => {
   try {
-    const res = await fetch(`${API_BASE}/products/stats`);
+    const res = await fetch(`${API_BASE}/products/stats?${new URLSearchParams(consistentParams())}`);
     const data = await res.json();
 
     setTotalProducts(data.total_products);
@@ -118,6 +126,7 @@ useEffect(() => {
         })
       });
       if (res.ok) {
+        markWrite();
         setOpen(false);
         setEditing(null);
         setForm({ sku: '', name: '', description: '', price: '', active: true });
@@ -136,6 +145,7 @@ useEffect(() => {
     try {
       const res = await fetch(`${API_BASE}/products/${sku}`, { method: 'DELETE' });
       if (res.ok) {
+        markWrite();
         fetchProducts();
         fetchStats();
       } else {
@@ -147,15 +157,42 @@ useEffect(() => {
     setDeleteSku(null);
   };
 
+  // Bulk operations run as background jobs; poll until this one finishes
+  // or give up, so a lost job cannot leave the spinner up forever
+  const waitForBulkJob = async (jobId, timeoutMs = 10 * 60 * 1000) => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const res = await fetch(`${API_BASE}/products/bulk/${jobId}/status`);
+      const job = await res.json();
+      if (!res.ok || ['completed', 'failed', 'cancelled'].includes(job.status)) {
+        return job;
+      }
+    }
+    return { error: 'Bulk delete is still running; refresh later to see the result' };
+  };
+
   const handleBulkDelete = async () => {
+    setShowBulkDelete(false);
     try {
-      await fetch(`${API_BASE}/products/bulk-delete`, { method: 'DELETE' });
+      const res = await fetch(`${API_BASE}/products/bulk-delete`, { method: 'DELETE' });
+      const data = await res.json();
+      if (!res.ok) {
+        alert(data.error || 'Bulk delete failed');
+        return;
+      }
+      setLoading(true);
+      const job = await waitForBulkJob(data.job_id);
+      if (job.status !== 'completed') {
+        alert(job.error_message || job.error || 'Bulk delete did not complete');
+      }
+      markWrite();
       fetchProducts();
       fetchStats();
     } catch (err) {
+      setLoading(false);
       alert('Network error');
     }
-    setShowBulkDelete(false);
   };
 
   const openEdit = (p) => {